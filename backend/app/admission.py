@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable
+
+from app.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue for one worker's event loop.
+
+    Requests beyond max_concurrent wait in the queue for up to max_wait seconds.
+    When the queue is full, or the wait runs out, the request is shed instead of
+    making everything behind it slower.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    async def acquire(self) -> bool:
+        """Wait for a slot and return True, or return False if the request should be shed"""
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            # asyncio.wait doesn't cancel the future, so a slot handed over at the last moment isn't lost
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # The client went away while queued - pass on a slot it may just have been given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+        if not waiter.done():
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+        waited = time.monotonic() - started
+        self.queued += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+        if waiter.cancelled():
+            self.timed_out += 1
+            self.shed += 1
+            return False
+
+        self.admitted += 1
+        return True
+
+    def release(self):
+        # Hand the slot straight to the next waiter so late arrivals can't jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._active -= 1
+
+    def retry_after(self) -> int:
+        """Rough seconds until a shed client is likely to get in"""
+        return max(1, math.ceil(self.max_wait))
+
+    def stats(self) -> Dict:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "queued": self.queued,
+            "avg_wait_ms": round(self.total_wait / self.queued * 1000, 1) if self.queued else 0.0,
+            "max_wait_ms": round(self.max_wait_seen * 1000, 1)
+        }
+
+class AdmissionControlMiddleware:
+    """ASGI middleware putting the requests under a path prefix behind an AdmissionController"""
+
+    def __init__(self, app, controller: AdmissionController, prefix: str, exclude: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.prefix = prefix
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        limited = (
+            scope["type"] == "http" and scope.get("method") != "OPTIONS" and
+            path.startswith(self.prefix) and not path.startswith(self.exclude)
+        )
+        if not limited:
+            await self.app(scope, receive, send)
+            return
+
+        # Shed before the body is read, so rejected uploads cost almost nothing
+        if not await self.controller.acquire():
+            logger.warning(f"Shedding {path}: {self.controller.stats()}")
+            response = FastJSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after())}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+# Identification does image I/O and several upstream calls, so it gets its own limit per worker
+identify_admission = AdmissionController(
+    max_concurrent=int(os.getenv("IDENTIFY_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("IDENTIFY_MAX_QUEUE", "16")),
+    max_wait=float(os.getenv("IDENTIFY_QUEUE_TIMEOUT_SECONDS", "5"))
+)
@@ -49,7 +49,8 @@ async def register(
     user_data = {
         "username": username,
         "hashed_password": hashed_password,
-        "plants": []
+        "plant_count": 0,
+        "collection_version": 0
     }
     
     # Insert into database
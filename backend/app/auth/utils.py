@@ -5,13 +5,25 @@ from fastapi.security import OAuth2PasswordBearer
 from bson.objectid import ObjectId
 
 from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, db
+from app.cache import get_cache
 from app.users.models import UserInDB, User
 from datetime import datetime, timedelta
 from typing import Optional, List
+import os
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# User documents by username. The local copy is kept short because the collection
+# version on it drives the plant ETags, and other workers only see invalidations
+# on their next poll.
+user_cache = get_cache(
+    "users",
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    local_ttl=float(os.getenv("USER_CACHE_LOCAL_TTL_SECONDS", "2"))
+)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -19,18 +31,31 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 def get_user(username: str):
-    user_dict = db.users.find_one({"username": username})
+    # Skip any legacy plants array (and in-flight change bookkeeping) so this load stays
+    # small, and keep the password hash out of the cache entirely
+    user_dict = user_cache.get_or_load(
+        username,
+        lambda: db.users.find_one({"username": username}, {"plants": 0, "pending_changes": 0, "hashed_password": 0})
+    )
     if user_dict:
         # We don't need to manually convert the ObjectId, the PyObjectId class will handle it
         return UserInDB(**user_dict)
     return None
 
+def invalidate_user(username: str):
+    """Drop a user from every worker's cache after the document changes"""
+    if username:
+        user_cache.invalidate(username)
+
 def authenticate_user(username: str, password: str):
+    # The hash is never cached, so read it straight from the user document
+    stored = db.users.find_one({"username": username}, {"hashed_password": 1})
+    if not stored or not verify_password(password, stored.get("hashed_password", "")):
+        return False
+    
     user = get_user(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
-        return False
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -43,21 +68,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_from_token(token: str) -> Optional[UserInDB]:
+    """The user a bearer token belongs to, or None if it isn't valid"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    
+    username = payload.get("sub")
+    return get_user(username) if username else None
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = get_user(username)
+    user = user_from_token(token)
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,500 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import db
+
+logger = logging.getLogger(__name__)
+
+# "mongo" (default), "sqlite" or "none" for per-process caching only
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "mongo").lower()
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "floradex-cache.sqlite3")
+CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "1"))
+
+# How long SQLite keeps invalidation messages for workers to pick up (Mongo uses a TTL index)
+INVALIDATION_RETENTION_SECONDS = 3600
+
+def _encode(value) -> str:
+    # Extended JSON keeps ObjectIds and datetimes intact through the shared store
+    return json_util.dumps(value)
+
+def _decode(data: str):
+    return json_util.loads(data)
+
+class MongoCacheBackend:
+    """Shared tier stored in Mongo, expired by the TTL indexes from ensure_indexes"""
+
+    def get(self, key: str):
+        return self.get_versioned(key)[0]
+
+    def get_versioned(self, key: str) -> Tuple[Any, int]:
+        """The cached value (None if missing or invalidated) and the key's version"""
+        entry = db.sharedcache.find_one({"_id": key})
+        if not entry:
+            return None, 0
+        # The TTL monitor only runs once a minute, so check expiry here too
+        if "value" not in entry or entry["expires_at"] <= datetime.utcnow():
+            return None, entry.get("version", 0)
+        return _decode(entry["value"]), entry.get("version", 0)
+
+    def set(self, key: str, value, ttl: float):
+        db.sharedcache.update_one(
+            {"_id": key},
+            {"$set": {"value": _encode(value), "expires_at": datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+
+    def set_if_version(self, key: str, value, ttl: float, version: int) -> bool:
+        """Store a value only if the key hasn't been invalidated since `version` was read"""
+        query = {"_id": key, "version": version} if version else {"_id": key, "version": {"$in": [0, None]}}
+        try:
+            db.sharedcache.update_one(
+                query,
+                {"$set": {
+                    "value": _encode(value),
+                    "version": version,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=ttl)
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The key exists with a newer version, so the upsert tried to insert a second copy
+            return False
+        return True
+
+    def invalidate(self, key: str, ttl: float):
+        """Drop the value and bump the key's version, so loads already under way can't write it back"""
+        db.sharedcache.update_one(
+            {"_id": key},
+            {
+                "$inc": {"version": 1},
+                "$unset": {"value": ""},
+                "$set": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl)}
+            },
+            upsert=True
+        )
+
+    def delete(self, key: str):
+        db.sharedcache.delete_one({"_id": key})
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        """Atomically add to a counter (created on first use) and return its new value"""
+        counter = db.sharedcounters.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"count": amount},
+                "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl)}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["count"]
+
+    def get_count(self, key: str) -> int:
+        """A counter's current value (0 if it doesn't exist), without creating it"""
+        counter = db.sharedcounters.find_one({"_id": key}, {"count": 1, "expires_at": 1})
+        if not counter or counter["expires_at"] <= datetime.utcnow():
+            return 0
+        return counter.get("count", 0)
+
+    def publish(self, namespace: str, key: str):
+        db.cacheinvalidations.insert_one({"namespace": namespace, "key": key, "at": datetime.utcnow()})
+
+    def poll(self, cursor) -> Tuple[List[Tuple[str, str]], Any]:
+        """Invalidations newer than the cursor, and the cursor to use next time"""
+        # Timestamps from different workers aren't strictly ordered, so re-read a short
+        # overlap window - applying an invalidation twice is harmless
+        if cursor is None:
+            return [], datetime.utcnow()
+
+        now = datetime.utcnow()
+        events = db.cacheinvalidations.find(
+            {"at": {"$gte": cursor - timedelta(seconds=2)}},
+            {"namespace": 1, "key": 1}
+        )
+        return [(event["namespace"], event["key"]) for event in events], now
+
+class SQLiteCacheBackend:
+    """Shared tier in a local SQLite file, for workers on a single host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            try:
+                # Cache files created before keys were versioned
+                connection.execute("ALTER TABLE cache ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT, key TEXT, at REAL)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, count INTEGER, expires_at REAL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and per forked worker, since the file is opened lazily)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str):
+        return self.get_versioned(key)[0]
+
+    def get_versioned(self, key: str) -> Tuple[Any, int]:
+        """The cached value (None if missing or invalidated) and the key's version"""
+        row = self._connection().execute(
+            "SELECT value, expires_at, version FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None, 0
+        value, expires_at, version = row
+        if value is None or expires_at <= time.time():
+            return None, version
+        return _decode(value), version
+
+    def set(self, key: str, value, ttl: float):
+        self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, _encode(value), time.time() + ttl)
+        )
+
+    def set_if_version(self, key: str, value, ttl: float, version: int) -> bool:
+        """Store a value only if the key hasn't been invalidated since `version` was read"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT version FROM cache WHERE key = ?", (key,)).fetchone()
+            current = row[0] if row else 0
+            if current == version:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, version) VALUES (?, ?, ?, ?)",
+                    (key, _encode(value), time.time() + ttl, version)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return current == version
+
+    def invalidate(self, key: str, ttl: float):
+        """Drop the value and bump the key's version, so loads already under way can't write it back"""
+        self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at, version) VALUES (?, NULL, ?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = NULL, expires_at = excluded.expires_at, version = version + 1",
+            (key, time.time() + ttl)
+        )
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        """Atomically add to a counter (created on first use) and return its new value"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR IGNORE INTO counters (key, count, expires_at) VALUES (?, 0, ?)", (key, time.time() + ttl)
+            )
+            connection.execute("UPDATE counters SET count = count + ? WHERE key = ?", (amount, key))
+            count = connection.execute("SELECT count FROM counters WHERE key = ?", (key,)).fetchone()[0]
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return count
+
+    def get_count(self, key: str) -> int:
+        """A counter's current value (0 if it doesn't exist), without creating it"""
+        row = self._connection().execute(
+            "SELECT count FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def publish(self, namespace: str, key: str):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("INSERT INTO invalidations (namespace, key, at) VALUES (?, ?, ?)", (namespace, key, now))
+        connection.execute("DELETE FROM invalidations WHERE at < ?", (now - INVALIDATION_RETENTION_SECONDS,))
+        connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        connection.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+
+    def poll(self, cursor) -> Tuple[List[Tuple[str, str]], Any]:
+        """Invalidations after the cursor (the last message id seen)"""
+        connection = self._connection()
+        if cursor is None:
+            row = connection.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()
+            return [], row[0]
+
+        rows = connection.execute(
+            "SELECT id, namespace, key FROM invalidations WHERE id > ? ORDER BY id", (cursor,)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [(namespace, key) for _, namespace, key in rows], rows[-1][0]
+
+def _build_backend():
+    try:
+        if CACHE_BACKEND == "mongo":
+            return MongoCacheBackend()
+        if CACHE_BACKEND == "sqlite":
+            return SQLiteCacheBackend(CACHE_SQLITE_PATH)
+    except Exception as e:
+        logger.error(f"Failed to set up the {CACHE_BACKEND} cache backend, caching per process only: {str(e)}")
+    return None
+
+class TieredCache:
+    """Per-process LRU in front of the shared backend.
+
+    Reads try the local LRU, then the shared tier (filling the LRU on a hit).
+    Invalidations drop the key everywhere and are broadcast so other workers
+    drop their local copies on their next poll.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int, local_ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        # Bounds how long a worker can serve a copy another worker has invalidated if polling stalls
+        self.local_ttl = local_ttl if local_ttl is not None else ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Loads under way per key - an invalidation marks them stale so they don't cache what they read
+        self._loads: Dict[str, List[list]] = {}
+        self._lock = threading.Lock()
+        # Updated under _lock - gets run on request threads and the thread pools at once
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _shared_key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.local_ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_local(self, key):
+        key = str(key)
+        with self._lock:
+            self._entries.pop(key, None)
+            for load in self._loads.get(key, ()):
+                load[0] = True
+
+    def _start_load(self, key: str) -> list:
+        load = [False]
+        with self._lock:
+            self._loads.setdefault(key, []).append(load)
+        return load
+
+    def _finish_load(self, key: str, load: list, value=None) -> bool:
+        """Keep a loaded value locally unless the key was invalidated while it loaded"""
+        with self._lock:
+            loads = [other for other in self._loads.get(key, []) if other is not load]
+            if loads:
+                self._loads[key] = loads
+            else:
+                self._loads.pop(key, None)
+            if load[0] or value is None:
+                return False
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def get(self, key):
+        key = str(key)
+        value = self._get_local(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        backend = shared_backend
+        if backend is not None:
+            try:
+                value = backend.get(self._shared_key(key))
+            except Exception as e:
+                logger.error(f"Shared cache read for {self.namespace} failed: {str(e)}")
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._set_local(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        key = str(key)
+        self._set_local(key, value)
+
+        backend = shared_backend
+        if backend is not None:
+            try:
+                backend.set(self._shared_key(key), value, self.ttl)
+            except Exception as e:
+                logger.error(f"Shared cache write for {self.namespace} failed: {str(e)}")
+
+    def get_or_load(self, key, loader: Callable[[], Any]):
+        """Cached value, or the loader's result (cached unless it's None).
+
+        Safe against invalidations that land while the value is loading: the shared
+        tier only takes the result if the key's version is unchanged, and the local
+        copy is skipped if this worker has dropped the key in the meantime.
+        """
+        key = str(key)
+        value = self._get_local(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        load = self._start_load(key)
+        backend = shared_backend
+        version = None
+        if backend is not None:
+            try:
+                value, version = backend.get_versioned(self._shared_key(key))
+            except Exception as e:
+                logger.error(f"Shared cache read for {self.namespace} failed: {str(e)}")
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._finish_load(key, load, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        try:
+            value = loader()
+        except BaseException:
+            self._finish_load(key, load)
+            raise
+
+        if value is None:
+            self._finish_load(key, load)
+            return value
+
+        stored = True
+        if backend is not None:
+            stored = False
+            if version is not None:
+                try:
+                    stored = backend.set_if_version(self._shared_key(key), value, self.ttl, version)
+                except Exception as e:
+                    logger.error(f"Shared cache write for {self.namespace} failed: {str(e)}")
+
+        # If another worker invalidated the key (or the shared tier is down) don't keep a copy
+        self._finish_load(key, load, value if stored else None)
+        return value
+
+    def invalidate(self, key):
+        """Drop a key in this worker and the shared tier, and tell the other workers"""
+        key = str(key)
+        self.drop_local(key)
+
+        backend = shared_backend
+        if backend is not None:
+            try:
+                # A versioned tombstone rather than a delete, so in-flight loads can't write it back
+                backend.invalidate(self._shared_key(key), self.ttl)
+                backend.publish(self.namespace, key)
+            except Exception as e:
+                logger.error(f"Shared cache invalidation for {self.namespace} failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, hits, shared_hits, misses = len(self._entries), self.hits, self.shared_hits, self.misses
+        lookups = hits + shared_hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "shared_hits": shared_hits,
+            "misses": misses,
+            "hit_ratio": round((hits + shared_hits) / lookups, 3) if lookups else None
+        }
+
+class InvalidationListener:
+    """Daemon thread applying other workers' invalidations to this worker's LRUs"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if shared_backend is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidations", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        cursor = None
+        while not self._stop.is_set():
+            try:
+                events, cursor = shared_backend.poll(cursor)
+                for namespace, key in events:
+                    cache = caches.get(namespace)
+                    if cache is not None:
+                        cache.drop_local(key)
+            except Exception as e:
+                logger.error(f"Polling cache invalidations failed: {str(e)}")
+            self._stop.wait(self.interval)
+
+shared_backend = _build_backend()
+
+# Every cache by namespace, so invalidation messages can find them
+caches: Dict[str, TieredCache] = {}
+
+def register_cache(namespace: str, cache):
+    """Route invalidations for a namespace to a cache with its own storage (needs drop_local)"""
+    caches[namespace] = cache
+
+def get_cache(namespace: str, ttl: float, max_entries: int, local_ttl: Optional[float] = None) -> TieredCache:
+    cache = caches.get(namespace)
+    if cache is None:
+        cache = caches[namespace] = TieredCache(namespace, ttl, max_entries, local_ttl)
+    return cache
+
+invalidation_listener = InvalidationListener(CACHE_INVALIDATION_POLL_SECONDS)
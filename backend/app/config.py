@@ -1,12 +1,16 @@
 import os
+import threading
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from app.metrics import MongoCommandListener
+
 load_dotenv()
 
 # MongoDB Configuration
 MONGODB_URI = os.getenv("MONGODB_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
+MONGODB_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "5000"))
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -14,5 +18,42 @@ ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
 # MongoDB Client
-client = MongoClient(MONGODB_URI)
-db = client[DATABASE_NAME]
\ No newline at end of file
+# Built on first use rather than at import, so importing the app never waits on
+# DNS/SRV resolution and each forked worker gets its own client
+_client = None
+_db = None
+_client_lock = threading.Lock()
+
+def get_client() -> MongoClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGODB_URI,
+                    connect=False,
+                    serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+                    event_listeners=[MongoCommandListener()]
+                )
+    return _client
+
+def get_db():
+    global _db
+    if _db is None:
+        _db = get_client()[DATABASE_NAME]
+    return _db
+
+class _LazyProxy:
+    """Stands in for the client/database until it is first used"""
+    
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+    
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+    
+    def __getitem__(self, name):
+        return self._factory()[name]
+
+client = _LazyProxy(get_client)
+db = _LazyProxy(get_db)
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.config import get_client
+from app.identification.perenual_api import perenual_api
+from app.identification.circuit_breaker import breakers
+from app.admission import identify_admission
+from app import cache, metrics
+from app.identification.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT_SECONDS = float(os.getenv("STARTUP_PROBE_TIMEOUT_SECONDS", "5"))
+
+# Filled in by the lifespan and the background probes
+health_status = {
+    "cold_start_ms": None,
+    "warm_up_ms": None,
+    "mongo": "unknown",
+    "perenual": "unknown"
+}
+
+router = APIRouter()
+
+def _ping_mongo():
+    get_client().admin.command("ping")
+    return True
+
+async def probe(name: str, check, timeout: float = PROBE_TIMEOUT_SECONDS):
+    """Run a blocking check in a thread with a timeout and record the outcome"""
+    try:
+        ok = await asyncio.wait_for(asyncio.to_thread(check), timeout)
+        health_status[name] = "ok" if ok else "failing"
+    except asyncio.TimeoutError:
+        health_status[name] = "timeout"
+        logger.error(f"{name} probe timed out after {timeout}s")
+    except Exception as e:
+        health_status[name] = "failing"
+        logger.error(f"{name} probe failed: {str(e)}")
+
+async def run_probes():
+    await asyncio.gather(
+        probe("mongo", _ping_mongo),
+        probe("perenual", lambda: perenual_api._test_api_connectivity(timeout=PROBE_TIMEOUT_SECONDS))
+    )
+
+async def warm_up(tasks, started: float):
+    """Run blocking start-up work off the event loop, after the worker is already serving"""
+    for name, task in tasks:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(task), PROBE_TIMEOUT_SECONDS * 6)
+        except Exception as e:
+            logger.error(f"Start-up task {name} failed: {str(e)}")
+    
+    await run_probes()
+    health_status["warm_up_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Warm-up finished in {health_status['warm_up_ms']} ms: {health_status}")
+
+def _collect_runtime_stats():
+    """Cache, breaker and admission stats that are already kept elsewhere"""
+    hits, misses = [], []
+    for name, cache_instance in cache.caches.items():
+        if name == "care":
+            lookups = cache_instance.lookups
+            hits.append(({"cache": name}, lookups["fresh"] + lookups["stale"]))
+            misses.append(({"cache": name}, lookups["miss"]))
+        else:
+            hits.append(({"cache": name}, cache_instance.hits + cache_instance.shared_hits))
+            misses.append(({"cache": name}, cache_instance.misses))
+    
+    ratios = []
+    for (labels, hit_count), (_, miss_count) in zip(hits, misses):
+        if hit_count + miss_count:
+            ratios.append((labels, round(hit_count / (hit_count + miss_count), 4)))
+    
+    states = {CLOSED: 0, HALF_OPEN: 0.5, OPEN: 1}
+    admission = identify_admission.stats()
+    
+    return [
+        ("cache_hits_total", "counter", "Cache lookups answered from a cache tier", hits),
+        ("cache_misses_total", "counter", "Cache lookups that missed every tier", misses),
+        ("cache_hit_ratio", "gauge", "Share of cache lookups that hit", ratios),
+        ("circuit_breaker_state", "gauge", "Circuit state (0 closed, 0.5 half-open, 1 open)",
+         [({"upstream": name}, states[breaker.state]) for name, breaker in breakers.items()]),
+        ("identify_admission_active", "gauge", "Identifications being served", [({}, admission["active"])]),
+        ("identify_admission_queue_depth", "gauge", "Identifications waiting for a slot", [({}, admission["queue_depth"])]),
+        ("identify_admission_shed_total", "counter", "Identifications rejected with a 503", [({}, admission["shed"])]),
+        ("identify_admission_avg_wait_ms", "gauge", "Average time queued identifications waited", [({}, admission["avg_wait_ms"])])
+    ]
+
+metrics.register_collector(_collect_runtime_stats)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Numbers are per worker process - with several workers a scrape reaches whichever one accepts it
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/health")
+async def get_health():
+    return dict(
+        health_status,
+        circuits={name: breaker.stats() for name, breaker in breakers.items()},
+        identify_admission=identify_admission.stats()
+    )
@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from app import cache as shared_cache
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+class CareInfoCache:
+    """LRU cache of Perenual care details with stale-while-revalidate semantics.
+    
+    Entries younger than fresh_ttl are served as they are. Older entries are still
+    served (up to stale_ttl) while a background refresh fetches a new copy, so only
+    a complete miss waits on Perenual. Local misses fall through to the shared
+    cache tier, so a species fetched by one worker is fresh in all of them.
+    """
+    
+    def __init__(self, fresh_ttl: float, stale_ttl: float, max_entries: int):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.lookups = {FRESH: 0, STALE: 0, MISS: 0}
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="care-refresh")
+    
+    def get(self, key) -> Tuple[Optional[Any], str]:
+        """Return (value, state) where state is FRESH, STALE or MISS"""
+        value, state = self._lookup(str(key))
+        # Called from request threads, the hedge pool and refresh threads at once
+        with self._lock:
+            self.lookups[state] += 1
+        return value, state
+    
+    def _lookup(self, key: str) -> Tuple[Optional[Any], str]:
+        with self._lock:
+            entry = self._entries.get(key)
+        
+        if entry is None:
+            entry = self._get_shared(key)
+            if entry is None:
+                return None, MISS
+        
+        with self._lock:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age > self.stale_ttl:
+                self._entries.pop(key, None)
+                return None, MISS
+            
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            return value, FRESH if age <= self.fresh_ttl else STALE
+    
+    def _get_shared(self, key: str):
+        """Entry from the shared tier, copied into this process's LRU"""
+        backend = shared_cache.shared_backend
+        if backend is None:
+            return None
+        
+        try:
+            shared = backend.get(f"care:{key}")
+        except Exception as e:
+            logger.error(f"Shared cache read for care details {key} failed: {str(e)}")
+            return None
+        if not shared:
+            return None
+        
+        # Ages are shared as wall-clock times and converted back to this process's clock
+        age = max(0.0, time.time() - shared["stored_at"])
+        entry = (shared["value"], time.monotonic() - age)
+        self._store_local(key, entry)
+        return entry
+    
+    def _store_local(self, key: str, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set(self, key, value):
+        key = str(key)
+        self._store_local(key, (value, time.monotonic()))
+        
+        backend = shared_cache.shared_backend
+        if backend is not None:
+            try:
+                backend.set(f"care:{key}", {"value": value, "stored_at": time.time()}, self.stale_ttl)
+            except Exception as e:
+                logger.error(f"Shared cache write for care details {key} failed: {str(e)}")
+    
+    def drop_local(self, key):
+        with self._lock:
+            self._entries.pop(str(key), None)
+    
+    def refresh_in_background(self, key, fetch: Callable[[Any], Any]):
+        """Re-fetch an entry on the refresh pool unless a refresh is already running"""
+        key = str(key)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                self.set(key, fetch(key))
+                logger.info(f"Refreshed cached care details for {key}")
+            except Exception as e:
+                # Keep serving the stale copy, the next request will try again
+                logger.error(f"Background refresh of care details for {key} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_pool.submit(refresh)
+
+# Shared care details cache for this process
+care_cache = CareInfoCache(
+    fresh_ttl=float(os.getenv("CARE_CACHE_TTL_SECONDS", str(24 * 3600))),
+    stale_ttl=float(os.getenv("CARE_CACHE_STALE_SECONDS", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("CARE_CACHE_MAX_ENTRIES", "5000"))
+)
+shared_cache.register_cache("care", care_cache)
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Per-upstream circuit breaker over a sliding window of recent calls.
+
+    The breaker opens when the share of failed calls, or of calls slower than
+    slow_call_seconds, in the window passes its threshold. While open every call
+    fails immediately; after open_seconds a single trial call is let through
+    (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, slow_call_seconds: float = 5.0,
+                 slow_call_rate: float = 0.5, window_size: int = 20, min_calls: int = 5,
+                 open_seconds: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        # (failed, slow) for each of the most recent calls
+        self._calls = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(self.name, max(remaining, 1))
+
+            # Open long enough - let one trial call through
+            self._state = HALF_OPEN
+            self._trial_running = True
+
+    def abandon(self):
+        """A call let through by before_call() didn't go ahead after all"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_running = False
+
+    def record(self, duration: float, failed: bool):
+        """Record the outcome of a call started after before_call()"""
+        slow = duration >= self.slow_call_seconds
+
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_running = False
+                if failed or slow:
+                    self._open()
+                else:
+                    logger.info(f"Circuit for {self.name} closed again")
+                    self._state = CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((failed, slow))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for call_failed, _ in self._calls if call_failed) / len(self._calls)
+                slow_calls = sum(1 for _, call_slow in self._calls if call_slow) / len(self._calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        logger.warning(f"Circuit for {self.name} opened for {self.open_seconds:.0f}s")
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "recent_calls": len(self._calls)}
+
+def _breaker_from_env(name: str) -> CircuitBreaker:
+    prefix = f"{name.upper()}_BREAKER"
+    return CircuitBreaker(
+        name,
+        failure_rate=float(os.getenv(f"{prefix}_FAILURE_RATE", "0.5")),
+        slow_call_seconds=float(os.getenv(f"{prefix}_SLOW_CALL_SECONDS", "5")),
+        slow_call_rate=float(os.getenv(f"{prefix}_SLOW_CALL_RATE", "0.5")),
+        window_size=int(os.getenv(f"{prefix}_WINDOW", "20")),
+        min_calls=int(os.getenv(f"{prefix}_MIN_CALLS", "5")),
+        open_seconds=float(os.getenv(f"{prefix}_OPEN_SECONDS", "30"))
+    )
+
+# One breaker per upstream, shared by every request in this process
+perenual_breaker = _breaker_from_env("perenual")
+plantnet_breaker = _breaker_from_env("plantnet")
+
+breakers = {breaker.name: breaker for breaker in (perenual_breaker, plantnet_breaker)}
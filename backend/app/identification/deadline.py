@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Monotonic time by which the current request must be answered, if it has a budget
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before an upstream call could be made"""
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Give everything called inside the block a shared time budget"""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None if there is no deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+def timeout_for(default: float) -> float:
+    """Timeout for an upstream call: the default, trimmed to what is left of the budget"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
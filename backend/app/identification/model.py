@@ -1,8 +1,23 @@
-import requests
+import hashlib
 import logging
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
 from dotenv import load_dotenv
+from app.cache import get_cache
+from app.lazy_imports import lazy_import
 from app.identification.perenual_api import perenual_api
+from app.identification.name_resolution import resolve_name, remember_resolution, record_hit
+from app.plants.species_store import is_default_care
+from app.identification.circuit_breaker import plantnet_breaker, CircuitOpenError
+from app.identification.deadline import DeadlineExceeded, expired, remaining, timeout_for
+from app.metrics import observe_upstream, upstream_requests
+from app.tracing import SPAN_KIND_CLIENT, current_span, span, traced
+
+# Imported on the first PlantNet call instead of at worker boot
+requests = lazy_import("requests")
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +26,13 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Identification results by image hash, so a re-uploaded photo skips PlantNet
+identify_cache = get_cache(
+    "identify",
+    ttl=float(os.getenv("IDENTIFY_CACHE_TTL_SECONDS", str(24 * 3600))),
+    max_entries=int(os.getenv("IDENTIFY_CACHE_MAX_ENTRIES", "1000"))
+)
+
 class PlantIdentifier:
     def __init__(self):
         # PlantNet API configuration
@@ -24,8 +46,105 @@ class PlantIdentifier:
             api_key_prefix = self.api_key[:4] if len(self.api_key) > 4 else "****"
             logger.info(f"PlantNet API key found with prefix: {api_key_prefix}***")
             logger.info(f"PlantNet API URL: {self.api_url}")
+        
+        self.timeout = float(os.getenv("PLANTNET_TIMEOUT_SECONDS", "15"))
+        
+        # Hedging sends a second identical request when the first is slower than
+        # usual (p95 of recent calls) and takes whichever answers first
+        self.hedge_enabled = os.getenv("PLANTNET_HEDGE", "false").lower() == "true"
+        self.hedge_delay = float(os.getenv("PLANTNET_HEDGE_DELAY_SECONDS", "3"))
+        self._latencies = deque(maxlen=200)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="plantnet")
+    
+    def _post_plantnet(self, params, files, timeout):
+        """POST an image to PlantNet under the circuit breaker"""
+        try:
+            plantnet_breaker.before_call()
+        except CircuitOpenError:
+            upstream_requests.inc(upstream="plantnet", endpoint="identify", status="circuit_open")
+            raise
+        
+        started = time.monotonic()
+        failed = True
+        status = "error"
+        try:
+            with span("plantnet POST identify", {"http.request.method": "POST"}, kind=SPAN_KIND_CLIENT) as call:
+                response = requests.post(
+                    self.api_url,
+                    params=params,
+                    files=files,
+                    timeout=timeout
+                )
+                call.set_attribute("http.response.status_code", response.status_code)
+            status = response.status_code
+            failed = response.status_code == 429 or response.status_code >= 500
+            if not failed:
+                self._latencies.append(time.monotonic() - started)
+            return response
+        finally:
+            plantnet_breaker.record(time.monotonic() - started, failed)
+            observe_upstream("plantnet", "identify", started, status)
+    
+    def _hedge_after(self):
+        """p95 of recent PlantNet latencies, or the configured delay until there are enough samples"""
+        if len(self._latencies) < 20:
+            return self.hedge_delay
+        latencies = sorted(self._latencies)
+        return latencies[int(len(latencies) * 0.95) - 1]
     
+    def _send_identification(self, params, files):
+        """Call PlantNet within the request deadline, hedging slow calls if enabled"""
+        timeout = timeout_for(self.timeout)
+        if not self.hedge_enabled:
+            return self._post_plantnet(params, files, timeout)
+        
+        # Run attempts in a copy of this context so their spans nest under the identification
+        primary = self._hedge_pool.submit(copy_context().run, self._post_plantnet, params, files, timeout)
+        done, _ = wait([primary], timeout=self._hedge_after())
+        if done:
+            return primary.result()
+        
+        # Slower than usual - race a second request against the first, if there's time left
+        logger.info("PlantNet request is slower than usual, sending a hedged request")
+        current_span().set_attribute("plantnet.hedged", True)
+        hedge = self._hedge_pool.submit(copy_context().run, self._post_plantnet, params, files, timeout_for(self.timeout))
+        pending = {primary, hedge}
+        error = None
+        
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                # The loser keeps running in the pool until its own timeout
+                raise DeadlineExceeded("Request deadline exceeded waiting for PlantNet")
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        
+        raise error
+    
+    @traced("PlantIdentifier.identify")
     def identify(self, image_bytes):
+        """Identify plant using PlantNet API, reusing the result for an image seen before"""
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        
+        cached = identify_cache.get(image_hash)
+        current_span().set_attribute("image.bytes", len(image_bytes))
+        current_span().set_attribute("identify.cache_hit", cached is not None)
+        if cached is not None:
+            logger.info(f"Serving cached identification for image {image_hash[:12]}")
+            # Callers add their own fields (image_url), so hand out a copy
+            return dict(cached)
+        
+        result = self._identify_uncached(image_bytes)
+        
+        # Generic fallback care isn't worth pinning - a later lookup may find the species
+        if not is_default_care(result.get("care_info", {})):
+            identify_cache.set(image_hash, result)
+        return dict(result)
+    
+    def _identify_uncached(self, image_bytes):
         """Identify plant using PlantNet API"""
         if not self.api_key:
             raise Exception("PlantNet API key not found in environment variables")
@@ -45,11 +164,8 @@ class PlantIdentifier:
             
             # Make the request to PlantNet API
             logger.info("Sending request to PlantNet API...")
-            response = requests.post(
-                self.api_url,
-                params=params,
-                files=files
-            )
+            with span("plantnet.upload", {"image.bytes": len(image_bytes), "plantnet.hedging": self.hedge_enabled}):
+                response = self._send_identification(params, files)
             
             # Check if the request was successful
             if response.status_code != 200:
@@ -87,7 +203,8 @@ class PlantIdentifier:
                     })
                 
                 # Sort predictions by confidence
-                predictions = sorted(predictions, key=lambda x: x['confidence'], reverse=True)
+                with span("sort_predictions", {"predictions": len(predictions)}):
+                    predictions = sorted(predictions, key=lambda x: x['confidence'], reverse=True)
                 
                 # Get the top prediction
                 top_prediction = predictions[0]
@@ -121,7 +238,28 @@ class PlantIdentifier:
                 care_details = None
                 used_search_term = None
                 
+                # A species we have resolved before goes straight to a single details lookup
+                resolution = resolve_name(scientific_name)
+                current_span().set_attribute("name_resolution.hit", bool(resolution))
+                if resolution:
+                    logger.info(f"Using stored resolution for '{scientific_name}': Perenual ID {resolution['perenual_id']}")
+                    care_details = perenual_api.get_plant_care_details(plant_id=resolution["perenual_id"])
+                    if care_details and not is_default_care(care_details):
+                        used_search_term = resolution.get("search_term") or scientific_name
+                        search_terms = [used_search_term]
+                        record_hit(scientific_name)
+                    else:
+                        care_details = None
+                
                 for term in search_terms:
+                    if used_search_term:
+                        break
+                    
+                    # Out of time - answer with what PlantNet told us and default care
+                    if expired():
+                        logger.warning("Request deadline reached, skipping remaining care lookups")
+                        break
+                    
                     try:
                         logger.info(f"Trying to find care details for '{term}' with Perenual API")
                         care_details = perenual_api.get_plant_care_details(plant_name=term)
@@ -129,15 +267,15 @@ class PlantIdentifier:
                         # If we found valid care details, use this term and break the loop
                         if care_details:
                             # Check for default values that would indicate the API didn't have specific data
-                            is_default = (
-                                care_details.get("care_instructions") == "General care instructions not available" or
-                                care_details.get("care_instructions") == "General care instructions for this plant" or
-                                care_details.get("watering_frequency") == "Check specific requirements for this species"
-                            )
+                            is_default = is_default_care(care_details)
                             
                             if not is_default:
                                 used_search_term = term
                                 logger.info(f"Successfully found care details using search term: '{term}'")
+                                
+                                # Remember the match so the next identification of this species skips the search
+                                remember_resolution(scientific_name, care_details.get("perenual_id"), term)
+                                record_hit(scientific_name)
                                 break
                             else:
                                 logger.info(f"Found only default care details for '{term}', trying next term")
@@ -154,31 +292,39 @@ class PlantIdentifier:
                     used_search_term = plant_type
                 
                 # Prepare the response
-                response = {
-                    "plant_type": plant_type,
-                    "scientific_name": scientific_name,
-                    "confidence": confidence,
-                    "all_predictions": predictions[:3],  # Return top 3 predictions
-                    "search_terms_tried": search_terms,  # Include all search terms that were attempted
-                    "search_term_matched": used_search_term,  # Term that matched in Perenual API
-                    # Include care details from the Perenual API
-                    "care_info": {
-                        "care_instructions": care_details.get("care_instructions", "No care instructions available"),
-                        "watering_frequency": care_details.get("watering_frequency", "Not specified"),
-                        "sunlight_requirements": care_details.get("sunlight_requirements", "Not specified"),
-                        "humidity": care_details.get("humidity", "Not specified"),
-                        "temperature": care_details.get("temperature", "Not specified"),
-                        "fertilization": care_details.get("fertilization", "Not specified"),
-                        "description": care_details.get("description", "Not available"),
-                        "perenual_image_url": care_details.get("image_url")
+                with span("build_response"):
+                    response = {
+                        "plant_type": plant_type,
+                        "scientific_name": scientific_name,
+                        "confidence": confidence,
+                        "all_predictions": predictions[:3],  # Return top 3 predictions
+                        "search_terms_tried": search_terms,  # Include all search terms that were attempted
+                        "search_term_matched": used_search_term,  # Term that matched in Perenual API
+                        # Include care details from the Perenual API
+                        "care_info": {
+                            "care_instructions": care_details.get("care_instructions", "No care instructions available"),
+                            "watering_frequency": care_details.get("watering_frequency", "Not specified"),
+                            "sunlight_requirements": care_details.get("sunlight_requirements", "Not specified"),
+                            "humidity": care_details.get("humidity", "Not specified"),
+                            "temperature": care_details.get("temperature", "Not specified"),
+                            "fertilization": care_details.get("fertilization", "Not specified"),
+                            "description": care_details.get("description", "Not available"),
+                            "perenual_image_url": care_details.get("image_url")
+                        }
                     }
-                }
+                
+                current_span().set_attribute("plant_type", plant_type)
+                current_span().set_attribute("search_term_matched", used_search_term)
+                current_span().set_attribute("care.default", is_default_care(care_details))
                 
                 logger.info(f"Identified plant as {plant_type} with {confidence:.2f} confidence")
                 return response
             else:
                 raise Exception("No plant identification results returned from API")
                 
+        except (CircuitOpenError, DeadlineExceeded):
+            # Let the route turn these into a 503/504 rather than a generic failure
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error: {str(e)}")
             raise Exception(f"API connection error: {str(e)}")
@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import DESCENDING
+
+from app.config import db
+from app.plants.species_search import normalise
+
+logger = logging.getLogger(__name__)
+
+# Resolutions already read or written by this process, least recently used first.
+# Entries expire so a resolution replaced or forgotten by another worker is picked up again.
+RESOLUTION_CACHE_SIZE = int(os.getenv("NAME_RESOLUTION_CACHE_SIZE", "10000"))
+RESOLUTION_CACHE_TTL_SECONDS = float(os.getenv("NAME_RESOLUTION_CACHE_TTL_SECONDS", "3600"))
+
+_resolved = OrderedDict()
+_resolved_lock = threading.Lock()
+
+def _cached(key: str) -> Optional[dict]:
+    with _resolved_lock:
+        entry = _resolved.get(key)
+        if entry is None:
+            return None
+        resolution, stored_at = entry
+        if time.monotonic() - stored_at > RESOLUTION_CACHE_TTL_SECONDS:
+            del _resolved[key]
+            return None
+        _resolved.move_to_end(key)
+        return resolution
+
+def _cache(key: str, resolution: dict):
+    with _resolved_lock:
+        _resolved[key] = (resolution, time.monotonic())
+        _resolved.move_to_end(key)
+        while len(_resolved) > RESOLUTION_CACHE_SIZE:
+            _resolved.popitem(last=False)
+
+def resolve_name(name: Optional[str]) -> Optional[dict]:
+    """Previously successful Perenual match for a plant name, if there is one"""
+    key = normalise(name)
+    if not key:
+        return None
+    
+    cached = _cached(key)
+    if cached:
+        return cached
+    
+    try:
+        resolution = db.nameresolutions.find_one({"_id": key})
+    except Exception as e:
+        logger.error(f"Failed to read name resolution for '{name}': {str(e)}")
+        return None
+    
+    if resolution:
+        _cache(key, resolution)
+    return resolution
+
+def remember_resolution(name: Optional[str], perenual_id, search_term: Optional[str]):
+    """Persist which Perenual ID (and which search term) a plant name resolved to"""
+    key = normalise(name)
+    if not key or not perenual_id:
+        return
+    
+    resolution = {
+        "_id": key,
+        "name": name,
+        "perenual_id": perenual_id,
+        "search_term": search_term,
+        "resolved_at": datetime.now()
+    }
+    
+    if (_cached(key) or {}).get("perenual_id") == perenual_id:
+        return
+    _cache(key, resolution)
+    
+    try:
+        db.nameresolutions.replace_one({"_id": key}, resolution, upsert=True)
+    except Exception as e:
+        logger.error(f"Failed to store name resolution for '{name}': {str(e)}")
+
+def forget_resolution(perenual_id):
+    """Drop every resolution pointing at a Perenual ID that no longer exists"""
+    if not perenual_id:
+        return
+    
+    with _resolved_lock:
+        for key in [key for key, (resolution, _) in _resolved.items() if resolution.get("perenual_id") == perenual_id]:
+            del _resolved[key]
+    
+    try:
+        db.nameresolutions.delete_many({"perenual_id": perenual_id})
+    except Exception as e:
+        logger.error(f"Failed to forget name resolutions for Perenual ID {perenual_id}: {str(e)}")
+
+def record_hit(name: Optional[str]):
+    """Count an identification of a resolved species, used to decide what to keep warm"""
+    key = normalise(name)
+    if not key:
+        return
+    
+    try:
+        db.nameresolutions.update_one(
+            {"_id": key},
+            {"$inc": {"hits": 1}, "$set": {"last_hit_at": datetime.now()}}
+        )
+    except Exception as e:
+        logger.error(f"Failed to record identification hit for '{name}': {str(e)}")
+
+def most_identified(limit: int) -> List[dict]:
+    """The most frequently identified species, most popular first"""
+    return list(
+        db.nameresolutions.find({"hits": {"$gt": 0}}, {"perenual_id": 1, "hits": 1})
+        .sort("hits", DESCENDING)
+        .limit(limit)
+    )
@@ -1,8 +1,22 @@
 import os
-import requests
 import logging
 import re
+import time
+from typing import Optional
 from dotenv import load_dotenv
+from app.lazy_imports import lazy_import
+from app.identification.rate_limiter import RateLimiter, UpstreamRateLimited
+from app.plants.species_store import find_local_care
+from app.plants.species_snapshot import lookup_snapshot_care
+from app.identification.name_resolution import forget_resolution, resolve_name, remember_resolution
+from app.identification.care_cache import care_cache, FRESH, STALE
+from app.identification.circuit_breaker import perenual_breaker, CircuitOpenError
+from app.identification.deadline import DeadlineExceeded, remaining, timeout_for
+from app.metrics import observe_upstream, upstream_endpoint, upstream_requests
+from app.tracing import SPAN_KIND_CLIENT, current_span, span, traced
+
+# Imported on the first Perenual call instead of at worker boot
+requests = lazy_import("requests")
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +31,12 @@ class PerenualAPI:
         self.api_key = os.getenv("PERENUAL_API_KEY")
         self.base_url = "https://perenual.com/api"
         
+        # Request paths aren't rate limited here (per-user limits and the breaker cover them).
+        # Batch jobs like catalog ingestion install a RateLimiter to pace themselves, and
+        # rate_limit_max_wait caps how long a call may wait for a token (None: as long as it takes)
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.rate_limit_max_wait: Optional[float] = None
+        
         if not self.api_key:
             logger.warning("Perenual API key not found in environment variables! Make sure PERENUAL_API_KEY is set in your .env file.")
         else:
@@ -24,14 +44,63 @@ class PerenualAPI:
             api_key_prefix = self.api_key[:4] if len(self.api_key) > 4 else "****"
             logger.info(f"Perenual API key found with prefix: {api_key_prefix}***")
             logger.info(f"Base URL set to: {self.base_url}")
+        
+        # Connectivity is checked by the background health probes at startup, not here,
+        # so importing this module never makes a network call
+        self.timeout = float(os.getenv("PERENUAL_TIMEOUT_SECONDS", "10"))
             
-        # Test API connectivity
+    def _get(self, path, params=None, timeout=None):
+        """Make a GET request to the Perenual API under the circuit breaker and rate limiter"""
+        request_params = {'key': self.api_key}
+        if params:
+            request_params.update(params)
+        
+        # Never wait longer than the current request has left (raises once it has run out)
+        request_timeout = timeout_for(timeout or self.timeout)
+        
+        endpoint = upstream_endpoint(path)
+        
+        # Fails fast while Perenual is failing or slow, instead of waiting out the timeout
         try:
-            self._test_api_connectivity()
-        except Exception as e:
-            logger.error(f"Failed to connect to Perenual API: {str(e)}")
+            perenual_breaker.before_call()
+        except CircuitOpenError:
+            upstream_requests.inc(upstream="perenual", endpoint=endpoint, status="circuit_open")
+            raise
+        
+        # Only checked once the call could actually go ahead, and never waits past the deadline
+        max_wait = self.rate_limit_max_wait
+        left = remaining()
+        if left is not None:
+            max_wait = left if max_wait is None else min(max_wait, left)
+        try:
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(max_wait):
+                upstream_requests.inc(upstream="perenual", endpoint=endpoint, status="rate_limited")
+                raise UpstreamRateLimited("Perenual request rate limit reached")
             
-    def _test_api_connectivity(self):
+            # Whatever the wait for a token used up comes off the timeout too
+            request_timeout = timeout_for(request_timeout)
+        except (UpstreamRateLimited, DeadlineExceeded):
+            # Don't leave a half-open breaker waiting on a trial call that never happened
+            perenual_breaker.abandon()
+            raise
+        
+        started = time.monotonic()
+        failed = True
+        status = "error"
+        try:
+            call_attributes = {"http.request.method": "GET", "url.path": endpoint, "perenual.search_term": (params or {}).get("q")}
+            with span(f"perenual GET {endpoint}", call_attributes, kind=SPAN_KIND_CLIENT) as call:
+                response = requests.get(f"{self.base_url}/{path}", params=request_params, timeout=request_timeout)
+                call.set_attribute("http.response.status_code", response.status_code)
+            status = response.status_code
+            # Rate limiting and server errors count against the breaker, client errors don't
+            failed = response.status_code == 429 or response.status_code >= 500
+            return response
+        finally:
+            perenual_breaker.record(time.monotonic() - started, failed)
+            observe_upstream("perenual", endpoint, started, status)
+    
+    def _test_api_connectivity(self, timeout=None):
         """Test if the API key works by making a simple request"""
         if not self.api_key:
             logger.error("Cannot test API connectivity without an API key")
@@ -40,15 +109,11 @@ class PerenualAPI:
         try:
             # Make a simple request to check if the API key works
             params = {
-                'key': self.api_key,
                 'q': 'test'  # Simple search term
             }
             
             logger.info("Testing Perenual API connectivity...")
-            response = requests.get(
-                f"{self.base_url}/species-list",
-                params=params
-            )
+            response = self._get("species-list", params, timeout=timeout)
             
             if response.status_code == 200:
                 logger.info("✅ Successfully connected to Perenual API!")
@@ -63,11 +128,20 @@ class PerenualAPI:
             logger.error(f"❌ Error testing API connectivity: {str(e)}")
             return False
     
+    @traced("PerenualAPI.search_plant_by_name")
     def search_plant_by_name(self, plant_name):
         """Search for plants by name and return matching results"""
         if not self.api_key:
             raise Exception("Perenual API key not configured")
         
+        # Names we have resolved before skip the trial-and-error search
+        resolution = resolve_name(plant_name)
+        current_span().set_attribute("plant_name", plant_name)
+        current_span().set_attribute("name_resolution.hit", bool(resolution))
+        if resolution:
+            logger.info(f"Resolved '{plant_name}' to Perenual ID {resolution['perenual_id']} from the resolution table")
+            return resolution["perenual_id"]
+        
         try:
             # Clean up the plant name - remove extra spaces, punctuation, etc.
             cleaned_name = self._clean_plant_name(plant_name)
@@ -80,9 +154,8 @@ class PerenualAPI:
             for search_term in search_variations:
                 logger.info(f"Trying search variation: {search_term}")
                 
-                # Set up the request parameters - make sure the API key param name is correct
+                # Set up the request parameters
                 params = {
-                    'key': self.api_key,
                     'q': search_term
                 }
                 
@@ -91,10 +164,7 @@ class PerenualAPI:
                 logger.info(f"Calling Perenual API with key prefix: {api_key_prefix}***")
                 
                 # Make the API request
-                response = requests.get(
-                    f"{self.base_url}/species-list",
-                    params=params
-                )
+                response = self._get("species-list", params)
                 
                 # Check if the request was successful
                 if response.status_code != 200:
@@ -118,6 +188,7 @@ class PerenualAPI:
                     
                     # Return the first (most relevant) result's ID
                     plant_id = result['data'][0]['id']
+                    remember_resolution(plant_name, plant_id, search_term)
                     return plant_id
                 else:
                     logger.warning(f"No plants found matching '{search_term}' in Perenual API")
@@ -129,8 +200,23 @@ class PerenualAPI:
             logger.error(f"Perenual API search request error: {str(e)}")
             raise Exception(f"Perenual API connection error: {str(e)}")
     
+    @traced("PerenualAPI.get_plant_care_details")
     def get_plant_care_details(self, plant_id=None, plant_name=None):
         """Get detailed care information for a plant by ID or name"""
+        trace = current_span()
+        trace.set_attribute("plant_id", plant_id)
+        trace.set_attribute("plant_name", plant_name)
+        
+        # The memory-mapped snapshot and the local catalog answer without a network call
+        local_care = (
+            lookup_snapshot_care(plant_id=plant_id, plant_name=plant_name) or
+            find_local_care(perenual_id=plant_id, plant_name=plant_name)
+        )
+        if local_care:
+            logger.info(f"Found care details for '{plant_name or plant_id}' in the local catalog")
+            trace.set_attribute("care.source", "local")
+            return local_care
+        
         if not self.api_key:
             raise Exception("Perenual API key not configured")
         
@@ -142,61 +228,83 @@ class PerenualAPI:
                 if not plant_id:
                     # If we still don't have an ID, return default care info
                     logger.warning(f"Could not find plant ID for '{plant_name}'")
+                    trace.set_attribute("care.source", "default")
                     return self._get_default_care_info(plant_name)
             
             # Ensure we have a plant ID to lookup
             if not plant_id:
                 raise Exception("Plant ID is required for care details lookup")
                 
-            logger.info(f"Getting care details for plant ID: {plant_id}")
-            
-            # Set up the request parameters
-            params = {
-                'key': self.api_key,
-            }
-            
-            # Log the URL we're calling (without the full API key for security)
-            api_key_prefix = self.api_key[:4] if self.api_key and len(self.api_key) > 4 else "****"
-            logger.info(f"Calling Perenual API with key prefix: {api_key_prefix}***")
-            
-            # Make the API request for species details
-            response = requests.get(
-                f"{self.base_url}/species/details/{plant_id}",
-                params=params
-            )
-            
-            # Check if the request was successful
-            if response.status_code != 200:
-                logger.error(f"Perenual API details request failed with status code {response.status_code}: {response.text}")
-                
-                # Special handling for API key issues
-                if response.status_code == 404 and "Missing/Issue with API Key" in response.text:
-                    logger.error("API key issue detected. Please check your Perenual API key configuration.")
-                    raise Exception("Invalid or missing Perenual API key. Please check your .env file.")
-                
-                if response.status_code == 429:  # Too Many Requests
-                    return self._get_default_care_info(plant_name or f"Plant ID: {plant_id}")
-                else:
-                    raise Exception(f"Perenual API error: {response.status_code} - {response.text}")
-            
-            # Parse the response
-            result = response.json()
-            
-            # Extract care info from the API response
-            care_info = self._extract_care_info(result)
-            logger.info(f"Successfully retrieved care details for plant ID: {plant_id}")
+            # Serve cached details, refreshing stale ones in the background
+            care_info, state = care_cache.get(plant_id)
+            trace.set_attribute("care.cache", state)
+            if state == FRESH:
+                trace.set_attribute("care.source", "cache")
+                return care_info
+            if state == STALE:
+                care_cache.refresh_in_background(plant_id, self._fetch_care_details)
+                trace.set_attribute("care.source", "cache")
+                return care_info
             
+            care_info = self._fetch_care_details(plant_id)
+            care_cache.set(plant_id, care_info)
+            trace.set_attribute("care.source", "perenual")
             return care_info
             
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # Stale cached copies were already served above, so this is a true miss
+            logger.warning(f"Skipping care details lookup: {str(e)}")
+            trace.set_attribute("care.source", "default")
+            trace.set_attribute("care.skipped", type(e).__name__)
+            return self._get_default_care_info(plant_name or f"Plant ID: {plant_id}")
         except requests.exceptions.RequestException as e:
             logger.error(f"Perenual API details request error: {str(e)}")
+            trace.set_attribute("care.source", "default")
             # Return default care info if we encounter an error
             return self._get_default_care_info(plant_name or f"Plant ID: {plant_id}")
         except Exception as e:
             logger.error(f"Error getting plant care details: {str(e)}")
+            trace.set_attribute("care.source", "default")
             # Return default care info if we encounter an error
             return self._get_default_care_info(plant_name or f"Plant ID: {plant_id}")
             
+    def _fetch_care_details(self, plant_id):
+        """Fetch care details for a plant ID from the Perenual API (raises on failure)"""
+        logger.info(f"Getting care details for plant ID: {plant_id}")
+        
+        # Log the URL we're calling (without the full API key for security)
+        api_key_prefix = self.api_key[:4] if self.api_key and len(self.api_key) > 4 else "****"
+        logger.info(f"Calling Perenual API with key prefix: {api_key_prefix}***")
+        
+        # Make the API request for species details
+        response = self._get(f"species/details/{plant_id}")
+        
+        # Check if the request was successful
+        if response.status_code != 200:
+            logger.error(f"Perenual API details request failed with status code {response.status_code}: {response.text}")
+            
+            # Special handling for API key issues
+            if response.status_code == 404 and "Missing/Issue with API Key" in response.text:
+                logger.error("API key issue detected. Please check your Perenual API key configuration.")
+                raise Exception("Invalid or missing Perenual API key. Please check your .env file.")
+            
+            if response.status_code == 404:
+                # The species is gone, so names resolved to it have to be searched for again
+                forget_resolution(plant_id)
+            
+            if response.status_code == 429:  # Too Many Requests
+                raise Exception("Perenual API rate limit reached")
+            raise Exception(f"Perenual API error: {response.status_code} - {response.text}")
+        
+        # Parse the response
+        result = response.json()
+        
+        # Extract care info from the API response
+        care_info = self._extract_care_info(result)
+        logger.info(f"Successfully retrieved care details for plant ID: {plant_id}")
+        
+        return care_info
+    
     def _clean_plant_name(self, plant_name):
         """Clean up plant name for better search matching"""
         if not plant_name:
@@ -276,7 +384,8 @@ class PerenualAPI:
                 "temperature": self._extract_temperature(api_response),
                 "fertilization": api_response.get('care_level', 'Medium'),
                 "description": api_response.get('description', 'No description available'),
-                "image_url": self._extract_image_url(api_response)
+                "image_url": self._extract_image_url(api_response),
+                "perenual_id": api_response.get('id')
             }
         except Exception as e:
             logger.error(f"Error extracting care info from API response: {str(e)}")
@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import db
+from app.identification.perenual_api import perenual_api
+from app.identification.circuit_breaker import CircuitOpenError
+from app.identification.rate_limiter import UpstreamRateLimited
+from app.plants.species_store import upsert_species
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_ID = "perenual_catalog"
+
+class CatalogRateLimited(Exception):
+    """Perenual answered 429 - stop and resume from the checkpoint later"""
+
+# Failures that say Perenual can't be called right now rather than that one species is
+# bad - ingestion stops without moving the checkpoint past them
+STOP_ERRORS = (CatalogRateLimited, UpstreamRateLimited, CircuitOpenError)
+
+def _fetch_json(path, params=None):
+    response = perenual_api._get(path, params)
+    
+    if response.status_code == 429:
+        raise CatalogRateLimited(f"Rate limited by Perenual on {path}")
+    if response.status_code != 200:
+        raise Exception(f"Perenual API error: {response.status_code} - {response.text}")
+    
+    return response.json()
+
+def load_checkpoint() -> dict:
+    return db.ingestionstate.find_one({"_id": CHECKPOINT_ID}) or {}
+
+def save_checkpoint(**fields):
+    fields["updated_at"] = datetime.now()
+    db.ingestionstate.update_one({"_id": CHECKPOINT_ID}, {"$set": fields}, upsert=True)
+
+def ingest_species(perenual_id, other_names=None, fresh_after: Optional[datetime] = None) -> bool:
+    """Fetch one species' details and store them locally, returns False if it was still fresh"""
+    if fresh_after:
+        existing = db.plantspecies.find_one({"perenual_id": perenual_id}, {"updated_at": 1})
+        if existing and existing.get("updated_at") and existing["updated_at"] >= fresh_after:
+            return False
+    
+    details = _fetch_json(f"species/details/{perenual_id}")
+    
+    # Normalise exactly like live lookups do
+    care_info = perenual_api._extract_care_info(details)
+    care_info["perenual_image_url"] = care_info.get("image_url")
+    
+    scientific_name = care_info.get("scientific_name")
+    if scientific_name == "Unknown":
+        scientific_name = None
+    
+    upsert_species(
+        care_info.get("name"),
+        scientific_name,
+        care_info,
+        perenual_id=perenual_id,
+        other_names=other_names or details.get("other_name") or None
+    )
+    return True
+
+def ingest_catalog(max_pages: Optional[int] = None, restart: bool = False, max_age_days: int = 30) -> dict:
+    """Page through the Perenual species list, storing details for new or stale species.
+    
+    Progress is checkpointed after every page, so an interrupted or rate limited
+    run carries on where it stopped the next time it is started.
+    """
+    checkpoint = load_checkpoint()
+    page = 1 if restart else checkpoint.get("next_page", 1)
+    fresh_after = datetime.now() - timedelta(days=max_age_days)
+    
+    stats = {"pages": 0, "stored": 0, "skipped": 0, "failed": 0, "completed": False, "rate_limited": False}
+    
+    try:
+        while max_pages is None or stats["pages"] < max_pages:
+            logger.info(f"Ingesting Perenual species list page {page}")
+            result = _fetch_json("species-list", {"page": page})
+            
+            for summary in result.get("data") or []:
+                try:
+                    if ingest_species(summary["id"], summary.get("other_name"), fresh_after):
+                        stats["stored"] += 1
+                    else:
+                        stats["skipped"] += 1
+                except STOP_ERRORS:
+                    raise
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error(f"Failed to ingest Perenual species {summary.get('id')}: {str(e)}")
+            
+            stats["pages"] += 1
+            last_page = result.get("last_page") or page
+            
+            if page >= last_page:
+                # Finished a full sweep - the next run starts over and only refreshes stale entries
+                save_checkpoint(next_page=1, last_page=last_page, completed_at=datetime.now())
+                stats["completed"] = True
+                break
+            
+            page += 1
+            save_checkpoint(next_page=page, last_page=last_page)
+    except STOP_ERRORS as e:
+        # The current page is retried on the next run; species already stored are skipped as fresh
+        logger.warning(f"{str(e)} - stopping at page {page}")
+        save_checkpoint(next_page=page)
+        stats["rate_limited"] = True
+    
+    logger.info(f"Perenual catalog ingestion finished: {stats}")
+    return stats
+
+def refresh_stale_species(max_age_days: int = 30, limit: Optional[int] = None) -> dict:
+    """Re-fetch details for locally stored species older than max_age_days, oldest first"""
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    cursor = db.plantspecies.find(
+        {"perenual_id": {"$exists": True}, "updated_at": {"$lt": cutoff}},
+        {"perenual_id": 1}
+    ).sort("updated_at", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    stats = {"refreshed": 0, "failed": 0, "rate_limited": False}
+    for species in cursor:
+        try:
+            ingest_species(species["perenual_id"])
+            stats["refreshed"] += 1
+        except STOP_ERRORS as e:
+            logger.warning(f"{str(e)} - stopping refresh")
+            stats["rate_limited"] = True
+            break
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"Failed to refresh Perenual species {species['perenual_id']}: {str(e)}")
+    
+    logger.info(f"Stale species refresh finished: {stats}")
+    return stats
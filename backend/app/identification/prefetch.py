@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+
+from app.identification.care_cache import care_cache, FRESH
+from app.identification.name_resolution import most_identified
+from app.identification.perenual_api import perenual_api
+from app.plants.species_snapshot import lookup_snapshot_care
+from app.plants.species_store import find_local_care
+
+logger = logging.getLogger(__name__)
+
+class CarePrefetcher:
+    """Background thread that keeps care details for the most identified species warm"""
+    
+    def __init__(self, top_n: int, interval: float):
+        self.top_n = top_n
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self.top_n <= 0 or self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="care-prefetch", daemon=True)
+        self._thread.start()
+        logger.info(f"Care prefetcher started for the top {self.top_n} species every {self.interval}s")
+    
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Care prefetch failed: {str(e)}")
+            self._stop.wait(self.interval)
+    
+    def run_once(self) -> int:
+        """Fetch any popular species that isn't fresh in the cache, returns how many were fetched"""
+        fetched = 0
+        for species in most_identified(self.top_n):
+            perenual_id = species.get("perenual_id")
+            if not perenual_id or self._stop.is_set():
+                continue
+            
+            # Species answered locally never reach the cache
+            if lookup_snapshot_care(plant_id=perenual_id) or find_local_care(perenual_id=perenual_id):
+                continue
+            
+            _, state = care_cache.get(perenual_id)
+            if state == FRESH:
+                continue
+            
+            try:
+                care_cache.set(perenual_id, perenual_api._fetch_care_details(perenual_id))
+                fetched += 1
+            except Exception as e:
+                logger.error(f"Failed to prefetch care details for {perenual_id}: {str(e)}")
+        
+        if fetched:
+            logger.info(f"Prefetched care details for {fetched} popular species")
+        return fetched
+
+care_prefetcher = CarePrefetcher(
+    top_n=int(os.getenv("CARE_PREFETCH_TOP_N", "50")),
+    interval=float(os.getenv("CARE_PREFETCH_INTERVAL_SECONDS", "600"))
+)
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Optional
+
+class UpstreamRateLimited(Exception):
+    """No request token became available within the time the caller could wait"""
+
+class RateLimiter:
+    """Token bucket used to keep upstream API calls under a request rate"""
+    
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Block until a request may be made"""
+        self.acquire()
+    
+    def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """Take a token, sleeping at most max_wait seconds for one (None waits as long as it takes).
+        
+        Returns False straight away, without sleeping, if no token will be free in time.
+        """
+        if self.rate <= 0:
+            return True
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                
+                delay = (1 - self._tokens) / self.rate
+                if max_wait is not None:
+                    if delay > max_wait:
+                        return False
+                    max_wait -= delay
+            
+            time.sleep(delay)
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Form, Request
 from fastapi.responses import JSONResponse
+from app.responses import FastJSONResponse
 from app.auth.utils import get_current_user
 from app.users.models import User
 from app.identification.model import plant_identifier
+from app.identification.circuit_breaker import CircuitOpenError
+from app.identification.deadline import DeadlineExceeded, request_deadline
+from app.tracing import SPAN_KIND_SERVER, current_span, span, traced
 from app.config import db
-from bson.objectid import ObjectId
+from app.plants.changes import reserve_change_seq, complete_change, stamp_insert
+from app.plants.species_store import upsert_species
+from app.stats.counters import record_plants_added, record_identification
 from datetime import datetime
 import os
+import asyncio
 import logging
 import json
 import base64
@@ -17,13 +24,26 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Overall time budget for one identification, shared by the PlantNet and Perenual calls
+IDENTIFY_DEADLINE_SECONDS = float(os.getenv("IDENTIFY_DEADLINE_SECONDS", "25"))
+
+def upstream_unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 telling the client when the identification provider is worth retrying"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(int(error.retry_after))}
+    )
+
 @router.post("/", response_model=dict)
+@traced("identify_plant", kind=SPAN_KIND_SERVER)
 async def identify_plant(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
     try:
         logger.info(f"Processing plant identification request from user: {current_user.username}")
+        current_span().set_attribute("user.id", current_user.id)
         
         # Read the image file
         image_bytes = await file.read()
@@ -40,9 +60,10 @@ async def identify_plant(
         file_path = f"static/uploads/plants/{filename}"
         
         # Save the image to your storage
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as f:
-            f.write(image_bytes)
+        with span("save_image", {"image.bytes": len(image_bytes)}):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(image_bytes)
         
         # Generate URL for the saved image
         image_url = f"/static/uploads/plants/{filename}"
@@ -51,14 +72,23 @@ async def identify_plant(
         try:
             # Identify the plant using PlantNet API
             logger.info("Calling PlantNet API via plant_identifier")
-            result = plant_identifier.identify(image_bytes)
+            # Off the event loop, so queued identifications don't stall other endpoints
+            with request_deadline(IDENTIFY_DEADLINE_SECONDS):
+                result = await asyncio.to_thread(plant_identifier.identify, image_bytes)
             
             # Add the image URL to the result
             result["image_url"] = image_url
+            record_identification(current_user.id, result)
             
             logger.info(f"Plant identified as {result.get('plant_type')} with {result.get('confidence')} confidence")
-            return result
+            return FastJSONResponse(result)
             
+        except CircuitOpenError as e:
+            logger.warning(f"Plant identification skipped: {str(e)}")
+            raise upstream_unavailable(e)
+        except DeadlineExceeded as e:
+            logger.error(f"Plant identification timed out: {str(e)}")
+            raise HTTPException(status_code=504, detail="Plant identification timed out")
         except Exception as identification_error:
             # Handle specific identification errors
             logger.error(f"Plant identification error: {str(identification_error)}")
@@ -78,11 +108,14 @@ async def identify_plant(
         )
 
 @router.post("/identify-base64", response_model=dict)
+@traced("identify_plant_base64", kind=SPAN_KIND_SERVER)
 async def identify_plant_base64(
     request: Request,
     current_user: User = Depends(get_current_user)
 ):
     try:
+        current_span().set_attribute("user.id", current_user.id)
+        
         # Parse the request body
         body = await request.json()
         image_data = body.get("image_data")
@@ -112,24 +145,33 @@ async def identify_plant_base64(
         file_path = f"static/uploads/plants/{filename}"
         
         # Save the image to your storage
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as f:
-            f.write(image_bytes)
+        with span("save_image", {"image.bytes": len(image_bytes)}):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(image_bytes)
         
         # Generate URL for the saved image
         image_url = f"/static/uploads/plants/{filename}"
         
         # Identify the plant
-        result = plant_identifier.identify(image_bytes)
+        with request_deadline(IDENTIFY_DEADLINE_SECONDS):
+            result = await asyncio.to_thread(plant_identifier.identify, image_bytes)
         
         # Add the image URL to the result
         result["image_url"] = image_url
+        record_identification(current_user.id, result)
         
-        return result
+        return FastJSONResponse(result)
         
     except HTTPException:
         # Re-raise HTTP exceptions as is
         raise
+    except CircuitOpenError as e:
+        logger.warning(f"Base64 identification skipped: {str(e)}")
+        raise upstream_unavailable(e)
+    except DeadlineExceeded as e:
+        logger.error(f"Base64 identification timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Plant identification timed out")
     except Exception as e:
         logger.error(f"Base64 identification error: {str(e)}")
         raise HTTPException(
@@ -167,23 +209,31 @@ async def add_to_collection(
             "all_predictions": plant_data.get("all_predictions", []),
             # Store scientific name if available
             "scientific_name": plant_data.get("scientific_name", ""),
-            # Store care information from the identification result
-            "care_info": plant_data.get("care_info", {})
+            # Care information is stored once per species and referenced from the plant
+            "species_id": upsert_species(
+                plant_type,
+                plant_data.get("scientific_name"),
+                plant_data.get("care_info") or {}
+            )
         }
         
         # If there's a Perenual image URL, store it as well
         if plant_data.get("care_info", {}).get("perenual_image_url"):
             plant["perenual_image_url"] = plant_data["care_info"]["perenual_image_url"]
         
-        # Insert the plant into userplants collection
-        result = db.userplants.insert_one(plant)
-        plant_id = str(result.inserted_id)
+        # Reserve a change sequence for the insert
+        seq = reserve_change_seq(current_user.id)
+        stamp_insert(plant, seq)
         
-        # Update the user's plants list
-        db.users.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {"$push": {"plants": plant_id}}
-        )
+        # Insert the plant into userplants collection, then count it and move the ETag past it
+        inserted = 0
+        try:
+            result = db.userplants.insert_one(plant)
+            inserted = 1
+        finally:
+            complete_change(current_user.id, seq, plant_delta=inserted)
+        plant_id = str(result.inserted_id)
+        record_plants_added(current_user.id, [plant])
         
         return {"success": True, "plant_id": plant_id}
     except Exception as e:
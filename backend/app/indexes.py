@@ -0,0 +1,34 @@
+import logging
+from pymongo import ASCENDING, DESCENDING
+
+from app.config import db
+
+logger = logging.getLogger(__name__)
+
+def ensure_indexes():
+    """Create the indexes the API relies on (no-op if they already exist)"""
+    try:
+        # Collection listing and delta sync both filter by user and change sequence
+        db.userplants.create_index([("user_id", ASCENDING), ("change_seq", ASCENDING)])
+        db.planttombstones.create_index([("user_id", ASCENDING), ("change_seq", ASCENDING)])
+        
+        # Care data is stored once per species, found by its normalised name
+        db.plantspecies.create_index("key", unique=True, sparse=True)
+        db.plantspecies.create_index("perenual_id", sparse=True)
+        
+        # Global top families/genera/species are read highest count first
+        db.collectionstatkeys.create_index([("kind", ASCENDING), ("count", DESCENDING)])
+        
+        # The care prefetcher reads the most identified species
+        db.nameresolutions.create_index([("hits", DESCENDING)])
+        
+        # Finished account deletion jobs are kept for a week so clients can read the outcome
+        db.deletionjobs.create_index("finished_at", expireAfterSeconds=7 * 24 * 3600)
+        
+        # Shared cache entries and worker invalidation messages expire on their own
+        db.sharedcache.create_index("expires_at", expireAfterSeconds=0)
+        db.cacheinvalidations.create_index("at", expireAfterSeconds=3600)
+        db.sharedcounters.create_index("expires_at", expireAfterSeconds=0)
+        logger.info("Database indexes ensured")
+    except Exception as e:
+        logger.error(f"Failed to create database indexes: {str(e)}")
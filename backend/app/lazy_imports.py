@@ -0,0 +1,34 @@
+import importlib
+import threading
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access.
+
+    Used for heavy dependencies (HTTP clients, ML frameworks) that most requests
+    and every worker boot would otherwise pay for at import time.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -1,3 +1,12 @@
+import time
+
+# Measured from here so the reported cold start includes importing the app
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,10 +17,47 @@ from app.plants import routes as plant_routes
 from app.identification import routes as identification_routes
 from app.plants import species_routes
 from app.plants import species
+from app.stats import routes as stats_routes
+from app.indexes import ensure_indexes
+from app.plants.species_store import load_local_species
+from app.plants.species_snapshot import open_species_snapshot
+from app.identification.prefetch import care_prefetcher
+from app.users.deletion import resume_deletion_jobs
+from app.cache import invalidation_listener
+from app.responses import FastJSONResponse
+from app.admission import AdmissionControlMiddleware, identify_admission
+from app.rate_limits import RateLimitHeadersMiddleware, RateLimitMiddleware
+from app.metrics import MetricsMiddleware
+from app import health
 
 import os
 
-app = FastAPI(title="Floradex API")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Only local, non-blocking work happens before the worker starts serving
+    open_species_snapshot()
+    invalidation_listener.start()
+    
+    # Everything that talks to Mongo or Perenual runs in the background
+    warm_up_task = asyncio.create_task(health.warm_up([
+        ("ensure_indexes", ensure_indexes),
+        ("load_local_species", load_local_species),
+        ("care_prefetcher", care_prefetcher.start),
+        ("resume_deletion_jobs", resume_deletion_jobs)
+    ], _import_started))
+    
+    health.health_status["cold_start_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    logger.info(f"Floradex API ready in {health.health_status['cold_start_ms']} ms")
+    
+    yield
+    
+    warm_up_task.cancel()
+    care_prefetcher.stop()
+    invalidation_listener.stop()
+
+app = FastAPI(title="Floradex API", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 os.makedirs("static/uploads/plants", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -22,6 +68,25 @@ origins = [
     "exp://172.20.10.7:8081"        # UWE Mobile Address
 ]
 
+# Load shedding for identification - added before CORS so 503s still carry CORS headers
+app.add_middleware(
+    AdmissionControlMiddleware,
+    controller=identify_admission,
+    prefix="/api/identify",
+    exclude=["/api/identify/add-to-collection"]
+)
+
+# Copies per-user rate limit headers onto every response
+app.add_middleware(RateLimitHeadersMiddleware)
+
+# Per-user identification limit, outside admission control so over-limit requests never queue
+app.add_middleware(
+    RateLimitMiddleware,
+    name="identify",
+    prefix="/api/identify",
+    exclude=["/api/identify/add-to-collection"]
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,6 +95,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so shed and rate limited requests are measured too
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_routes.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(user_routes.router, prefix="/api/users", tags=["Users"])
@@ -45,6 +113,8 @@ app.include_router(
     prefix="/api/plant-species",  # Endpoint for plant care lookup by name
     tags=["plant-species"]
 )
+app.include_router(stats_routes.router, prefix="/api/stats", tags=["Stats"])
+app.include_router(health.router, tags=["Health"])
 
 @app.get("/")
 async def root():
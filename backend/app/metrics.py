@@ -0,0 +1,207 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+# Latency buckets in seconds, from cache hits up to upstream timeouts
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, value in children:
+            lines.extend(self._render_child(self._labels(key), value))
+        return lines
+
+    def _render_child(self, labels, value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Counts per bucket (non-cumulative, made cumulative when rendered), then sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            child[0][index] += 1
+            child[1] += value
+
+    def _render_child(self, labels, value) -> List[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            bucket_labels = dict(labels, le=_format_value(float(bound)) if bound != float("inf") else "+Inf")
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+registry: List[_Metric] = []
+
+# Callbacks returning (name, type, help, [(labels, value)]) for stats that already
+# live elsewhere (caches, breakers) - read at scrape time, so they cost nothing per request
+collectors: List[Callable[[], List[tuple]]] = []
+
+def register_collector(collector: Callable[[], List[tuple]]):
+    collectors.append(collector)
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    for collector in collectors:
+        for name, metric_type, help_text, samples in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+http_response_size = Histogram("http_response_size_bytes", "HTTP response body size", ("route",), buckets=SIZE_BUCKETS)
+
+# Upstream APIs
+upstream_requests = Counter("upstream_requests_total", "Upstream API calls by outcome", ("upstream", "endpoint", "status"))
+upstream_latency = Histogram("upstream_request_duration_seconds", "Upstream API call latency", ("upstream", "endpoint"))
+
+# MongoDB
+mongo_latency = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ("command",))
+mongo_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands", ("command",))
+
+# Perenual paths carry plant IDs - fold them so each endpoint is one series
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def upstream_endpoint(path: str) -> str:
+    return _ID_SEGMENT.sub("/{id}", path)
+
+def observe_upstream(upstream: str, endpoint: str, started: float, status):
+    """Record an upstream call that started at `started` (time.monotonic)"""
+    upstream_latency.observe(time.monotonic() - started, upstream=upstream, endpoint=endpoint)
+    upstream_requests.inc(upstream=upstream, endpoint=endpoint, status=status)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command the Mongo client runs (durations come from the driver)"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_latency.observe(event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        mongo_latency.observe(event.duration_micros / 1e6, command=event.command_name)
+        mongo_failures.inc(command=event.command_name)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, size and in-flight count per route"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Optional[Dict] = None
+
+    def _route_for(self, scope) -> str:
+        # Label by route template (/api/plants/{plant_id}), never the raw path, to bound cardinality
+        if self._route_paths is None:
+            # Routes match on their endpoint, mounts (static files) on their app
+            self._route_paths = {
+                getattr(route, "endpoint", None) or getattr(route, "app", None): route.path
+                for route in scope["app"].routes
+            }
+        endpoint = scope.get("endpoint")
+        return self._route_paths.get(endpoint, "unmatched") if endpoint else "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_in_flight.dec()
+            route = self._route_for(scope)
+            method = scope.get("method", "")
+            http_latency.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=status)
+            http_response_size.observe(size, route=route)
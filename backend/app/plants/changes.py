@@ -0,0 +1,111 @@
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from typing import List
+
+from app.config import db
+from app.auth.utils import invalidate_user
+
+# A write that reserved a sequence and never completed (the worker died) stops
+# holding back sync tokens after this long
+PENDING_CHANGE_TIMEOUT_SECONDS = 60
+
+def reserve_change_seq(user_id, count: int = 1) -> int:
+    """Reserve change sequence numbers for a user's collection and return the highest one.
+    
+    The reservation stays pending until complete_change is called once the write
+    has landed, so sync tokens never move past a sequence that isn't readable yet.
+    """
+    # The sequence is the same counter used for the collection ETag, so one
+    # update reserves the sequences and records them as pending. It has to be a
+    # single update, or a sync could read the bumped counter before the pending
+    # entry exists.
+    version = {"$ifNull": ["$collection_version", 0]}
+    fields = {
+        "collection_version": {"$add": [version, count]},
+        "pending_changes": {"$concatArrays": [
+            {"$ifNull": ["$pending_changes", []]},
+            [{"seq": {"$add": [version, count]}, "from": {"$add": [version, 1]}, "at": "$$NOW"}]
+        ]}
+    }
+    user = db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        [{"$set": fields}],
+        projection={"collection_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if not user:
+        return count
+    
+    return user.get("collection_version", count)
+
+def complete_change(user_id, seq: int, plant_delta: int = 0):
+    """Mark a reserved change as written and bump the collection version again.
+    
+    Reads between the reservation and the write could have paired the reserved
+    version with the old data, so the ETag has to move once more after the write.
+    plant_delta is what the write actually did (inserted/deleted counts), so
+    failed or lost writes never skew the user's plant count.
+    """
+    increments = {"collection_version": 1}
+    if plant_delta:
+        increments["plant_count"] = plant_delta
+    
+    user = db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$inc": increments, "$pull": {"pending_changes": {"seq": seq}}},
+        projection={"username": 1}
+    )
+    
+    if user:
+        # Cached copies carry the old version, which would produce stale ETags
+        invalidate_user(user.get("username"))
+
+def sync_horizon(user_id) -> int:
+    """Highest sequence a sync token may safely reach.
+    
+    Read before querying the changes: everything at or below it has either landed
+    already or belongs to a reservation that is still pending, and pending
+    reservations hold the horizon back to just below their first sequence.
+    """
+    user = db.users.find_one({"_id": ObjectId(user_id)}, {"collection_version": 1, "pending_changes": 1})
+    if not user:
+        return 0
+    
+    horizon = user.get("collection_version", 0)
+    cutoff = datetime.utcnow() - timedelta(seconds=PENDING_CHANGE_TIMEOUT_SECONDS)
+    for pending in user.get("pending_changes", []):
+        if pending["at"] >= cutoff:
+            horizon = min(horizon, pending["from"] - 1)
+    return horizon
+
+def unclaimed(query: dict) -> dict:
+    """Narrow a userplants query to plants no bulk delete has claimed.
+    
+    Claims left behind by a delete that died expire after the pending change timeout.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=PENDING_CHANGE_TIMEOUT_SECONDS)
+    return dict(query, **{"$or": [{"deleting_seq": {"$exists": False}}, {"deleting_at": {"$lt": cutoff}}]})
+
+def stamp_insert(plant: dict, seq: int):
+    """Add change tracking fields to a plant document that is about to be inserted"""
+    plant["created_seq"] = seq
+    plant["change_seq"] = seq
+    plant["updated_at"] = datetime.now()
+
+def record_tombstones(user_id, plant_ids: List[str], seq: int):
+    """Remember deleted plants so sync clients can drop them"""
+    if not plant_ids:
+        return
+    
+    deleted_at = datetime.now()
+    db.planttombstones.insert_many([
+        {
+            "user_id": str(user_id),
+            "plant_id": plant_id,
+            "change_seq": seq,
+            "deleted_at": deleted_at
+        }
+        for plant_id in plant_ids
+    ])
@@ -0,0 +1,44 @@
+from fastapi import Request, Response
+import hashlib
+
+def collection_etag(user, *parts) -> str:
+    """Build a weak ETag from the user's collection version and any extra parts"""
+    # The version lives on the user document, so no userplants read is needed here
+    version = getattr(user, "collection_version", 0)
+    
+    # Fold in anything else that changes the representation (plant id, projection...)
+    suffix = ""
+    if parts:
+        digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8"))
+        suffix = f"-{digest.hexdigest()[:12]}"
+    
+    return f'W/"{user.id}-{version}{suffix}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    
+    if header.strip() == "*":
+        return True
+    
+    # Weak comparison - ignore the W/ prefix on both sides
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    
+    return False
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 response carrying the ETag"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def set_etag(response: Response, etag: str):
+    """Attach the ETag and revalidation headers to a normal response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+from uuid import uuid4
+
+UPLOAD_DIR = "static/uploads/plants"
+
+# Shared pool for image file I/O so bulk operations can write/delete files concurrently
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="plant-images")
+
+def save_plant_image(image_data, user_id) -> str:
+    """Decode base64 image data, save it and return its URL (empty string on failure)"""
+    if not image_data:
+        return ""
+    
+    try:
+        # Create directory for uploaded images if it doesn't exist
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        
+        # Random names can't collide, even for uploads in the same second from several workers
+        filename = f"{user_id}_{uuid4().hex}.jpg"
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        # Handle base64 image data
+        # Check if it includes the "data:image" prefix
+        if isinstance(image_data, str) and "," in image_data:
+            # Split at the first comma to get just the base64 part
+            image_data = image_data.split(",", 1)[1]
+            
+        # Save the image file
+        with open(file_path, "wb") as f:
+            f.write(base64.b64decode(image_data))
+            
+        print(f"Image saved to {file_path}")
+        
+        # Store the relative URL path
+        return f"/static/uploads/plants/{filename}"
+        
+    except Exception as e:
+        print(f"Error saving image: {str(e)}")
+        # Continue even if image saving fails
+        return ""
+
+def delete_plant_image(image_url: Optional[str]) -> bool:
+    """Delete the file behind a plant image URL, returns True if a file was removed"""
+    if not image_url:
+        return False
+    
+    try:
+        # Get the file path from the URL
+        file_path = image_url.lstrip("/")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            print(f"Deleted image file: {file_path}")
+            return True
+    except Exception as e:
+        print(f"Error deleting image file: {str(e)}")
+    
+    return False
+
+async def save_plant_images(images: List, user_id) -> List[str]:
+    """Save several images concurrently, returning their URLs in the same order"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*[
+        loop.run_in_executor(_io_pool, save_plant_image, image_data, user_id)
+        for image_data in images
+    ])
+
+async def delete_plant_images_async(image_urls: Iterable[Optional[str]]) -> int:
+    """Delete several image files concurrently from async code, returns how many were removed"""
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(_io_pool, delete_plant_image, image_url)
+        for image_url in image_urls if image_url
+    ])
+    return sum(1 for removed in results if removed)
+
+def delete_plant_images(image_urls: Iterable[Optional[str]]) -> int:
+    """Delete several image files concurrently from sync code, returns how many were removed"""
+    urls = [image_url for image_url in image_urls if image_url]
+    return sum(1 for removed in _io_pool.map(delete_plant_image, urls) if removed)
@@ -38,6 +38,44 @@ class UserPlant(BaseModel):
         }
     }
 
+# Fields that can be selected with the fields= parameter on the plant endpoints
+PLANT_FIELDS = (
+    "_id", "type", "user_id", "date_added", "name", "confidence", "all_predictions",
+    "species_id", "image_url", "scientific_name", "perenual_image_url", "care_info"
+)
+
+# Compact projection used by the list endpoint when no fields are requested
+SUMMARY_FIELDS = ("_id", "name", "type", "image_url")
+
+# Default projection for a single plant - the fields exposed by UserPlant
+DETAIL_FIELDS = (
+    "_id", "type", "user_id", "date_added", "name", "confidence", "all_predictions",
+    "species_id", "image_url"
+)
+
+# Partial view of a UserPlant returned when a projection has been applied
+class UserPlantFields(BaseModel):
+    id: Optional[str] = Field(alias="_id", default=None)
+    type: Optional[str] = None
+    user_id: Optional[str] = None
+    date_added: Optional[str] = None
+    name: Optional[str] = None
+    confidence: Optional[float] = None
+    all_predictions: Optional[List[Dict[str, Any]]] = None
+    species_id: Optional[str] = None
+    image_url: Optional[str] = None
+    scientific_name: Optional[str] = None
+    perenual_image_url: Optional[str] = None
+    care_info: Optional[Dict[str, Any]] = None
+
+    model_config = {
+        "populate_by_name": True
+    }
+
+# Body of POST /plants/bulk-delete - non-string ids are rejected with a 422 before the route runs
+class BulkDeleteRequest(BaseModel):
+    plant_ids: List[str]
+
 # New model for plant species
 class PlantSpecies(BaseModel):
     id: Optional[str] = Field(alias="_id", default=None)
@@ -0,0 +1,40 @@
+from fastapi import HTTPException
+from typing import Dict, Optional, Sequence
+
+from app.plants.models import PLANT_FIELDS, SUMMARY_FIELDS
+
+def wants_care_info(projection: Dict[str, int]) -> bool:
+    """Whether the projection asks for care_info, which is hydrated from the species"""
+    return "care_info" in projection
+
+def build_projection(fields: Optional[str], default: Sequence[str]) -> Dict[str, int]:
+    """Turn a comma separated fields= selector into a MongoDB projection"""
+    if not fields:
+        selected = list(default)
+    elif fields == "summary":
+        selected = list(SUMMARY_FIELDS)
+    elif fields == "all":
+        selected = list(PLANT_FIELDS)
+    else:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        
+        # Accept "id" as a friendlier name for the Mongo primary key
+        selected = ["_id" if field == "id" else field for field in selected]
+        
+        unknown = [field for field in selected if field not in PLANT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields requested: {', '.join(unknown)}"
+            )
+    
+    # The id is always returned so clients can address the plant afterwards
+    projection = {"_id": 1}
+    for field in selected:
+        projection[field] = 1
+    
+    # care_info lives on the species, so the reference is needed to hydrate it
+    if "care_info" in projection:
+        projection["species_id"] = 1
+    
+    return projection
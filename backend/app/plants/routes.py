@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Dict, Any, Optional
 from bson.objectid import ObjectId
-import os
-import base64
 from datetime import datetime
+from pymongo.errors import BulkWriteError
 
 from app.config import db
 from app.auth.utils import get_current_user
 from app.users.models import User
-from app.plants.models import UserPlant  # Changed from Plant to UserPlant
+from app.plants.models import UserPlantFields, BulkDeleteRequest, SUMMARY_FIELDS, DETAIL_FIELDS
+from app.plants.projection import build_projection, wants_care_info
+from app.plants.species_store import hydrate_care_info
+from app.responses import FastJSONResponse
+from app.plants.etag import collection_etag, is_not_modified, not_modified_response, set_etag
+from app.plants.images import save_plant_image, save_plant_images, delete_plant_image, delete_plant_images_async
+from app.plants.changes import reserve_change_seq, complete_change, sync_horizon, stamp_insert, record_tombstones, unclaimed
+from app.stats.counters import record_plants_added, record_plants_removed
 
 router = APIRouter()
 
-@router.get("/", response_model=List[UserPlant])
-async def get_plants(current_user: User = Depends(get_current_user)):
+@router.get("/", response_model=List[UserPlantFields], response_model_exclude_unset=True)
+async def get_plants(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, or 'summary'/'all'"),
+    current_user: User = Depends(get_current_user)
+):
     # Print for debugging
     print(f"Current user ID: {current_user.id}, type: {type(current_user.id)}")
     
+    # Only fetch the fields the client asked for (a compact summary by default)
+    projection = build_projection(fields, SUMMARY_FIELDS)
+    
+    # Answer straight from the collection version if the client is up to date
+    etag = collection_etag(current_user, "list", *projection)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
     # Get all plants for the current user
     # Now using userplants collection instead of plants
-    plants = list(db.userplants.find({"user_id": str(current_user.id)}))
+    plants = list(db.userplants.find({"user_id": str(current_user.id)}, projection))
     
     # Print for debugging
     print(f"Found {len(plants)} plants")
@@ -28,19 +46,93 @@ async def get_plants(current_user: User = Depends(get_current_user)):
     for plant in plants:
         plant["_id"] = str(plant["_id"])
     
-    return plants
+    if wants_care_info(projection):
+        hydrate_care_info(plants)
+    
+    # The projection already limits the documents to UserPlant fields, so skip
+    # re-validating them against the response model and encode them directly
+    response = FastJSONResponse(plants)
+    set_etag(response, etag)
+    return response
+
+@router.get("/sync", response_model=dict)
+async def sync_plants(
+    since: int = Query(0, ge=0, description="Sync token returned by the previous sync, 0 for a full sync"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, or 'summary'/'all'"),
+    current_user: User = Depends(get_current_user)
+):
+    user_id = str(current_user.id)
+    projection = build_projection(fields, DETAIL_FIELDS)
+    projection.update({"created_seq": 1, "change_seq": 1, "updated_at": 1})
+    
+    # Read before the changes, so everything at or below it has landed or is still pending
+    horizon = sync_horizon(user_id)
+    
+    # A zero token means the client has nothing yet, so send the whole collection
+    query = {"user_id": user_id}
+    if since:
+        query["change_seq"] = {"$gt": since}
+    changed = list(db.userplants.find(query, projection).sort("change_seq", 1))
+    
+    deleted = []
+    if since:
+        deleted = list(db.planttombstones.find(
+            {"user_id": user_id, "change_seq": {"$gt": since}},
+            {"plant_id": 1, "change_seq": 1}
+        ).sort("change_seq", 1))
+    
+    # The next token is the highest sequence the client has seen, held back below any
+    # write that reserved its sequence but hasn't landed yet. Changes above the token
+    # are sent again next time, which clients apply idempotently.
+    seen = since
+    inserted = []
+    updated = []
+    for plant in changed:
+        plant["_id"] = str(plant["_id"])
+        created_seq = plant.pop("created_seq", 0)
+        change_seq = plant.pop("change_seq", 0)
+        seen = max(seen, change_seq)
+        
+        if created_seq > since or not since:
+            inserted.append(plant)
+        else:
+            updated.append(plant)
+    
+    for tombstone in deleted:
+        seen = max(seen, tombstone["change_seq"])
+    token = max(since, min(seen, horizon))
+    
+    if wants_care_info(projection):
+        hydrate_care_info(changed)
+    
+    return FastJSONResponse({
+        "token": token,
+        "full": not since,
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": [tombstone["plant_id"] for tombstone in deleted]
+    })
 
-@router.get("/{plant_id}", response_model=UserPlant)
+@router.get("/{plant_id}", response_model=UserPlantFields, response_model_exclude_unset=True)
 async def get_plant(
     plant_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, or 'summary'/'all'"),
     current_user: User = Depends(get_current_user)
 ):
+    projection = build_projection(fields, DETAIL_FIELDS)
+    
+    # An ETag is only handed out for plants that exist, so a match means it is unchanged
+    etag = collection_etag(current_user, plant_id, *projection)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
     # Get a specific plant by ID
     # Now using userplants collection
     plant = db.userplants.find_one({
         "_id": ObjectId(plant_id),
         "user_id": str(current_user.id)
-    })
+    }, projection)
     
     if not plant:
         raise HTTPException(status_code=404, detail="Plant not found")
@@ -48,7 +140,12 @@ async def get_plant(
     # Convert ObjectId to string
     plant["_id"] = str(plant["_id"])
     
-    return plant
+    if wants_care_info(projection):
+        hydrate_care_info([plant])
+    
+    response = FastJSONResponse(plant)
+    set_etag(response, etag)
+    return response
 
 @router.post("/", response_model=Dict[str, Any])
 async def create_plant(
@@ -59,34 +156,7 @@ async def create_plant(
     image_data = plant_data.pop("image_data", None)
     
     # Handle image processing if provided
-    image_url = ""
-    if image_data:
-        try:
-            # Create directory for uploaded images if it doesn't exist
-            upload_dir = "static/uploads/plants"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Create a unique filename
-            filename = f"{current_user.id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-            file_path = os.path.join(upload_dir, filename)
-            
-            # Handle base64 image data
-            # Check if it includes the "data:image" prefix
-            if isinstance(image_data, str) and "," in image_data:
-                # Split at the first comma to get just the base64 part
-                image_data = image_data.split(",", 1)[1]
-                
-            # Save the image file
-            with open(file_path, "wb") as f:
-                f.write(base64.b64decode(image_data))
-                
-            # Store the relative URL path
-            image_url = f"/static/uploads/plants/{filename}"
-            print(f"Image saved to {file_path}")
-            
-        except Exception as e:
-            print(f"Error saving image: {str(e)}")
-            # Continue even if image saving fails
+    image_url = save_plant_image(image_data, current_user.id)
     
     # Remove the _id field if it's None
     if plant_data.get("_id") is None:
@@ -99,14 +169,18 @@ async def create_plant(
     if image_url:
         plant_data["image_url"] = image_url
     
-    # Insert the plant into userplants collection
-    result = db.userplants.insert_one(plant_data)
+    # Reserve a change sequence for the insert
+    seq = reserve_change_seq(current_user.id)
+    stamp_insert(plant_data, seq)
     
-    # Update the user's plants list
-    db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$push": {"plants": str(result.inserted_id)}}
-    )
+    # Insert the plant into userplants collection, then count it and move the ETag past it
+    inserted = 0
+    try:
+        result = db.userplants.insert_one(plant_data)
+        inserted = 1
+    finally:
+        complete_change(current_user.id, seq, plant_delta=inserted)
+    record_plants_added(current_user.id, [plant_data])
     
     # Fetch the created plant and convert _id to string
     created_plant = db.userplants.find_one({"_id": result.inserted_id})
@@ -129,24 +203,147 @@ async def delete_plant(
     if not plant:
         raise HTTPException(status_code=404, detail="Plant not found")
     
+    # Reserve a change sequence for the delete
+    seq = reserve_change_seq(current_user.id)
+    
+    # Remove the plant from the userplants collection and leave a tombstone for sync clients.
+    # Only the request whose delete actually removed it does the bookkeeping, so racing or
+    # retried deletes of the same plant can't count it twice.
+    deleted = 0
+    try:
+        result = db.userplants.delete_one(unclaimed({"_id": ObjectId(plant_id), "user_id": str(current_user.id)}))
+        deleted = result.deleted_count
+        if deleted:
+            record_tombstones(current_user.id, [plant_id], seq)
+    finally:
+        complete_change(current_user.id, seq, plant_delta=-deleted)
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Plant not found")
+    record_plants_removed(current_user.id, [plant])
+    
     # If plant has an image URL, try to delete the file
-    if "image_url" in plant and plant["image_url"]:
+    delete_plant_image(plant.get("image_url"))
+    
+    return {"success": True}
+
+@router.post("/bulk", response_model=dict)
+async def bulk_create_plants(
+    payload: Dict[str, Any],
+    current_user: User = Depends(get_current_user)
+):
+    """Create several plants with one insert and one user update"""
+    items = payload.get("plants")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="A non-empty 'plants' list is required")
+    
+    user_id = str(current_user.id)
+    
+    # Write all the images at the same time
+    images = [item.pop("image_data", None) if isinstance(item, dict) else None for item in items]
+    image_urls = await save_plant_images(images, current_user.id)
+    
+    results = []
+    docs = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "success": False, "error": "Plant data must be an object"})
+            continue
+        
+        if item.get("_id") is None:
+            item["_id"] = ObjectId()
+        item["user_id"] = user_id
+        if image_urls[index]:
+            item["image_url"] = image_urls[index]
+        
+        docs.append((index, item))
+        results.append({"index": index, "success": True, "plant_id": str(item["_id"])})
+    
+    if docs:
+        # Reserve one change sequence per plant in a single user update
+        last_seq = reserve_change_seq(current_user.id, count=len(docs))
+        first_seq = last_seq - len(docs) + 1
+        for offset, (_, doc) in enumerate(docs):
+            stamp_insert(doc, first_seq + offset)
+        
+        failed_images = []
+        inserted = 0
         try:
-            # Get the file path from the URL
-            file_path = plant["image_url"].lstrip("/")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"Deleted image file: {file_path}")
-        except Exception as e:
-            print(f"Error deleting image file: {str(e)}")
-    
-    # Remove the plant from the userplants collection
-    db.userplants.delete_one({"_id": ObjectId(plant_id)})
-    
-    # Remove the plant ID from the user's plants list
-    db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$pull": {"plants": plant_id}}
-    )
-    
-    return {"success": True}
\ No newline at end of file
+            inserted = len(db.userplants.insert_many([doc for _, doc in docs], ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Mark the plants that failed
+            inserted = e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                index, _ = docs[error["index"]]
+                results[index] = {"index": index, "success": False, "error": error.get("errmsg", "Insert failed")}
+                failed_images.append(image_urls[index])
+        finally:
+            # Count only the plants that were actually inserted
+            complete_change(current_user.id, last_seq, plant_delta=inserted)
+        
+        if failed_images:
+            await delete_plant_images_async(failed_images)
+        
+        record_plants_added(current_user.id, [doc for index, doc in docs if results[index]["success"]])
+    
+    created = sum(1 for result in results if result["success"])
+    return {"success": created == len(items), "created": created, "results": results}
+
+@router.post("/bulk-delete", response_model=dict)
+async def bulk_delete_plants(
+    payload: BulkDeleteRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Delete several plants with one delete and one user update"""
+    plant_ids = payload.plant_ids
+    if not plant_ids:
+        raise HTTPException(status_code=400, detail="A non-empty 'plant_ids' list is required")
+    
+    user_id = str(current_user.id)
+    valid_ids = [plant_id for plant_id in plant_ids if ObjectId.is_valid(plant_id)]
+    
+    # Only the user's own plants can be deleted
+    owned = {}
+    if valid_ids:
+        for plant in db.userplants.find(
+            {"_id": {"$in": [ObjectId(plant_id) for plant_id in valid_ids]}, "user_id": user_id},
+            {"image_url": 1, "type": 1, "scientific_name": 1, "all_predictions": 1}
+        ):
+            owned[str(plant["_id"])] = plant
+    
+    deleted_ids = []
+    if owned:
+        seq = reserve_change_seq(current_user.id)
+        deleted = 0
+        try:
+            # Claim the plants first, so plants another request deletes in the meantime are
+            # left to it - the claimed set is exactly what this request removes and counts
+            db.userplants.update_many(
+                unclaimed({"_id": {"$in": [ObjectId(plant_id) for plant_id in owned]}, "user_id": user_id}),
+                {"$set": {"deleting_seq": seq, "deleting_at": datetime.utcnow()}}
+            )
+            deleted_ids = [
+                str(plant["_id"])
+                for plant in db.userplants.find({"user_id": user_id, "deleting_seq": seq}, {"_id": 1})
+            ]
+            if deleted_ids:
+                deleted = db.userplants.delete_many({"user_id": user_id, "deleting_seq": seq}).deleted_count
+                record_tombstones(current_user.id, deleted_ids, seq)
+        finally:
+            complete_change(current_user.id, seq, plant_delta=-deleted)
+        record_plants_removed(current_user.id, [owned[plant_id] for plant_id in deleted_ids])
+        
+        # Remove the image files at the same time
+        await delete_plant_images_async(owned[plant_id].get("image_url") for plant_id in deleted_ids)
+    
+    results = []
+    deleted_set = set(deleted_ids)
+    for plant_id in plant_ids:
+        if plant_id in deleted_set:
+            results.append({"plant_id": plant_id, "success": True})
+        elif plant_id in valid_ids:
+            results.append({"plant_id": plant_id, "success": False, "error": "Plant not found"})
+        else:
+            results.append({"plant_id": plant_id, "success": False, "error": "Invalid plant ID"})
+    
+    return {"success": len(deleted_ids) == len(plant_ids), "deleted": len(deleted_ids), "results": results}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.auth.utils import get_current_user
 from app.users.models import User
+from app.rate_limits import rate_limited
 from app.identification.perenual_api import perenual_api
 import logging
 
@@ -13,7 +13,7 @@ router = APIRouter()
 @router.get("/{plant_type}", response_model=dict)
 async def get_plant_species_info(
     plant_type: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limited("species"))
 ):
     """
     Get care information for a specific plant species by its type/name from Perenual API.
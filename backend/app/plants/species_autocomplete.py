@@ -0,0 +1,79 @@
+import bisect
+import threading
+from typing import Dict, List
+
+from app.plants.species_search import normalise
+
+class SpeciesAutocomplete:
+    """Sorted array of species names for prefix lookups with bisect.
+
+    Every word boundary of a name is indexed, so "delic" finds "Monstera
+    deliciosa" as well as "monst". Matches on the start of the full name rank
+    ahead of matches on a later word.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Sorted (key, word position, species id) tuples
+        self._entries: List[tuple] = []
+        self._seen = set()
+        self._species: Dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self._species)
+
+    def add(self, species: dict):
+        """Index the common, scientific and other names of a species"""
+        species_id = str(species.get("_id") or "")
+        if not species_id:
+            return
+
+        names = [species.get("name"), species.get("scientific_name")] + list(species.get("other_names") or [])
+
+        with self._lock:
+            self._species[species_id] = {
+                "_id": str(species.get("perenual_id") or species_id),
+                "name": species.get("name", ""),
+                "scientific_name": species.get("scientific_name") or "Unknown"
+            }
+
+            for name in names:
+                words = normalise(name).split()
+                for position in range(len(words)):
+                    key = " ".join(words[position:])
+                    if (key, species_id) in self._seen:
+                        continue
+                    self._seen.add((key, species_id))
+                    bisect.insort(self._entries, (key, position, species_id))
+
+    def complete(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Species whose names (or a word in them) start with the prefix"""
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+
+        entries = self._entries
+        start = bisect.bisect_left(entries, (prefix,))
+
+        # Collect a few more than needed so full-name matches can be ranked first
+        matches = []
+        for index in range(start, min(start + limit * 5, len(entries))):
+            key, position, species_id = entries[index]
+            if not key.startswith(prefix):
+                break
+            matches.append((position, len(key), species_id))
+
+        results = []
+        returned = set()
+        for _, _, species_id in sorted(matches):
+            if species_id in returned:
+                continue
+            returned.add(species_id)
+            results.append(self._species[species_id])
+            if len(results) >= limit:
+                break
+
+        return results
+
+# Shared autocomplete structure, filled at startup and kept up to date by upsert_species
+species_autocomplete = SpeciesAutocomplete()
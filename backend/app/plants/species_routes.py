@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional, Dict, Any
-from app.auth.utils import get_current_user
 from app.users.models import User
+from app.rate_limits import rate_limited
 from app.identification.perenual_api import perenual_api
+from app.identification.circuit_breaker import CircuitOpenError
+from app.identification.routes import upstream_unavailable
+from app.plants.species_search import species_index
+from app.plants.species_autocomplete import species_autocomplete
+from app.plants.species_store import remember_species, get_species
 import logging
 
 # Set up logging
@@ -11,12 +16,31 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _format_local_species(species: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a locally stored species like the Perenual based responses"""
+    return {
+        # Prefer the Perenual ID so the result can be looked up again either way
+        "_id": str(species.get("perenual_id") or species["_id"]),
+        "name": species.get("name", ""),
+        "scientific_name": species.get("scientific_name") or "Unknown",
+        "care_instructions": species.get("care_instructions", ""),
+        "watering_frequency": species.get("watering_frequency", ""),
+        "sunlight_requirements": species.get("sunlight_requirements", ""),
+        "humidity": species.get("humidity", ""),
+        "temperature": species.get("temperature", ""),
+        "fertilization": species.get("fertilization", ""),
+        "description": species.get("description", ""),
+        "image_url": species.get("perenual_image_url"),
+        "score": species.get("score")
+    }
+
 @router.get("/", response_model=List[Dict[str, Any]])
 async def get_plant_species(
     name: Optional[str] = Query(None, description="Filter species by name"),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
+    current_user: User = Depends(rate_limited("species"))
 ):
-    """Get plant species from Perenual API with optional filter by name"""
+    """Get plant species from the local index, falling back to the Perenual API on a miss"""
     try:
         # We'll use the search functionality of the Perenual API
         logger.info(f"Searching for plant species with name: {name}")
@@ -36,6 +60,12 @@ async def get_plant_species(
                 }
             ]
         
+        # Answer from the local species index when we can
+        local_matches = species_index.search(name, limit=limit)
+        if local_matches:
+            logger.info(f"Found {len(local_matches)} local species matching '{name}'")
+            return [_format_local_species(species) for species in local_matches]
+        
         # Use the Perenual API to search for plants
         try:
             # First get the plant ID from the search
@@ -45,6 +75,9 @@ async def get_plant_species(
                 # Get the full details
                 care_details = perenual_api.get_plant_care_details(plant_id=plant_id)
                 
+                # Keep the species locally so the next search doesn't leave the process
+                remember_species(care_details, perenual_id=plant_id)
+                
                 # Format the response to match the expected schema
                 return [
                     {
@@ -76,6 +109,10 @@ async def get_plant_species(
                     }
                 ]
                 
+        except CircuitOpenError as e:
+            # Nothing local matched and Perenual is known to be down - tell the client when to retry
+            logger.warning(f"Species search skipped: {str(e)}")
+            raise upstream_unavailable(e)
         except Exception as e:
             logger.error(f"Error searching Perenual API: {str(e)}")
             raise HTTPException(
@@ -83,6 +120,8 @@ async def get_plant_species(
                 detail=f"Failed to search plant species: {str(e)}"
             )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_plant_species: {str(e)}")
         raise HTTPException(
@@ -90,10 +129,19 @@ async def get_plant_species(
             detail=f"Failed to get plant species: {str(e)}"
         )
 
+@router.get("/autocomplete", response_model=List[Dict[str, Any]])
+async def autocomplete_plant_species(
+    prefix: str = Query(..., min_length=1, description="Start of a common or scientific name"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    current_user: User = Depends(rate_limited("species_autocomplete"))
+):
+    """Suggest species names from the in-memory prefix index (never calls Perenual)"""
+    return species_autocomplete.complete(prefix, limit=limit)
+
 @router.get("/{species_id}", response_model=Dict[str, Any])
 async def get_plant_species_by_id(
     species_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limited("species"))
 ):
     """Get a specific plant species by Perenual API ID"""
     try:
@@ -107,6 +155,11 @@ async def get_plant_species_by_id(
                     status_code=404,
                     detail="Invalid plant species ID"
                 )
+            
+            # Species found through the local index may only have our own ID
+            local_species = get_species(species_id)
+            if local_species:
+                return _format_local_species(local_species)
                 
             # Get the full details from Perenual API
             care_details = perenual_api.get_plant_care_details(plant_id=species_id)
@@ -0,0 +1,137 @@
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# Share of the query's trigrams a name must contain to be considered at all
+MIN_TRIGRAM_OVERLAP = 0.3
+
+# Results scoring below this are noise rather than fuzzy matches
+MIN_SCORE = 0.25
+
+# Only the names sharing the most trigrams with the query are scored in full
+MAX_CANDIDATES = 200
+
+def normalise(text: Optional[str]) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalised string, padded so short words still produce some"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SpeciesSearchIndex:
+    """In-memory token and trigram index over every species name we know about.
+
+    Each species can be found by its common name, scientific name and any other
+    names. Queries are matched on exact name, prefix, token coverage and trigram
+    similarity, so small typos ("monstra") still find the right species.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._species: Dict[str, dict] = {}
+        # One entry per searchable name: (species id, normalised name, tokens, trigrams)
+        self._names: List[tuple] = []
+        self._names_by_species: Dict[str, set] = defaultdict(set)
+        self._trigram_postings: Dict[str, List[int]] = defaultdict(list)
+        # Direct lookups for callers that already know the exact name or Perenual ID
+        self._by_name: Dict[str, str] = {}
+        self._by_perenual_id: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._species)
+
+    def add(self, species: dict):
+        """Add or refresh a species record (needs at least an "_id" and a name)"""
+        species_id = str(species.get("_id") or "")
+        if not species_id:
+            return
+
+        names = [species.get("name"), species.get("scientific_name")] + list(species.get("other_names") or [])
+
+        with self._lock:
+            self._species[species_id] = species
+            if species.get("perenual_id"):
+                self._by_perenual_id[str(species["perenual_id"])] = species_id
+
+            for name in names:
+                name = normalise(name)
+                if not name or name in self._names_by_species[species_id]:
+                    continue
+
+                name_index = len(self._names)
+                name_tokens = set(name.split())
+                name_trigrams = trigrams(name)
+                self._names.append((species_id, name, name_tokens, name_trigrams))
+                self._names_by_species[species_id].add(name)
+                self._by_name.setdefault(name, species_id)
+
+                for gram in name_trigrams:
+                    self._trigram_postings[gram].append(name_index)
+
+    def add_many(self, species_list: Iterable[dict]):
+        for species in species_list:
+            self.add(species)
+
+    def get(self, species_id: str) -> Optional[dict]:
+        return self._species.get(species_id)
+
+    def find_exact(self, name: str) -> Optional[dict]:
+        """Species with exactly this (normalised) common, scientific or other name"""
+        species_id = self._by_name.get(normalise(name))
+        return self._species.get(species_id) if species_id else None
+
+    def find_by_perenual_id(self, perenual_id) -> Optional[dict]:
+        species_id = self._by_perenual_id.get(str(perenual_id))
+        return self._species.get(species_id) if species_id else None
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Ranked species matching the query, best first"""
+        query = normalise(query)
+        if not query:
+            return []
+
+        query_tokens = query.split()
+        query_trigrams = trigrams(query)
+
+        # Candidates share enough trigrams with the query; only the best of them get scored.
+        # A name containing a query word (or starting with the query) shares nearly all its
+        # trigrams, so exact, prefix and whole word matches always make the cut.
+        hits = Counter()
+        for gram in query_trigrams:
+            hits.update(self._trigram_postings.get(gram, ()))
+
+        min_hits = MIN_TRIGRAM_OVERLAP * len(query_trigrams)
+        candidates = [
+            name_index for name_index, hit_count in hits.most_common(MAX_CANDIDATES)
+            if hit_count >= min_hits
+        ]
+
+        best_scores: Dict[str, float] = {}
+        for name_index in candidates:
+            species_id, name, name_tokens, name_trigrams = self._names[name_index]
+
+            # Similarity of the whole strings plus how many query words the name contains
+            similarity = len(query_trigrams & name_trigrams) / len(query_trigrams | name_trigrams)
+            coverage = sum(
+                1 for token in query_tokens
+                if token in name_tokens or any(name_token.startswith(token) for name_token in name_tokens)
+            ) / len(query_tokens)
+
+            score = similarity + coverage
+            if name == query:
+                score += 2
+            elif name.startswith(query):
+                score += 1
+
+            if score >= MIN_SCORE and score > best_scores.get(species_id, 0):
+                best_scores[species_id] = score
+
+        ranked = sorted(best_scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [dict(self._species[species_id], score=round(score, 3)) for species_id, score in ranked]
+
+# Shared index, filled from plantspecies at startup and kept up to date by upsert_species
+species_index = SpeciesSearchIndex()
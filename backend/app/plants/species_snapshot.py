@@ -0,0 +1,191 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, Optional
+
+from app.plants.species_search import normalise
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library if orjson isn't installed
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# File layout (all integers little endian):
+#   header        magic, version, record count, name count and the offsets of the sections below
+#   name table    one (blob offset, length, record index) entry per name, sorted by name bytes
+#   name blob     the normalised names, UTF-8
+#   record table  one (blob offset, length) entry per record
+#   record blob   the records, JSON encoded
+MAGIC = b"FLSNAP\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIQQQQ")
+NAME_ENTRY = struct.Struct("<IHI")
+RECORD_ENTRY = struct.Struct("<QI")
+
+# Fields kept per species - the same shape PerenualAPI.get_plant_care_details returns
+RECORD_FIELDS = (
+    "name", "scientific_name", "care_instructions", "watering_frequency", "sunlight_requirements",
+    "humidity", "temperature", "fertilization", "description", "image_url", "perenual_id"
+)
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _loads(data: bytes) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def perenual_id_key(perenual_id) -> str:
+    """Name under which a record can be looked up by its Perenual ID"""
+    return f"id:{perenual_id}"
+
+def write_species_snapshot(path: str, species_list: Iterable[dict]) -> int:
+    """Write a snapshot file from species records and return how many were written"""
+    records = []
+    names = {}
+
+    for species in species_list:
+        record = {field: species.get(field) for field in RECORD_FIELDS}
+        if record["image_url"] is None:
+            record["image_url"] = species.get("perenual_image_url")
+
+        record_index = len(records)
+        records.append(_dumps(record))
+
+        keys = [species.get("name"), species.get("scientific_name")] + list(species.get("other_names") or [])
+        for key in keys:
+            key = normalise(key)
+            if key:
+                # The first species with a name keeps it
+                names.setdefault(key.encode("utf-8")[:65535], record_index)
+        if species.get("perenual_id"):
+            names.setdefault(perenual_id_key(species["perenual_id"]).encode("utf-8"), record_index)
+
+    sorted_names = sorted(names.items())
+
+    name_table_offset = HEADER.size
+    name_blob_offset = name_table_offset + NAME_ENTRY.size * len(sorted_names)
+    name_blob_size = sum(len(name) for name, _ in sorted_names)
+    record_table_offset = name_blob_offset + name_blob_size
+    record_blob_offset = record_table_offset + RECORD_ENTRY.size * len(records)
+
+    # Write to a temporary file and swap it in so running workers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, len(records), len(sorted_names),
+            name_table_offset, name_blob_offset, record_table_offset, record_blob_offset
+        ))
+
+        offset = 0
+        for name, record_index in sorted_names:
+            f.write(NAME_ENTRY.pack(offset, len(name), record_index))
+            offset += len(name)
+        for name, _ in sorted_names:
+            f.write(name)
+
+        offset = 0
+        for record in records:
+            f.write(RECORD_ENTRY.pack(offset, len(record)))
+            offset += len(record)
+        for record in records:
+            f.write(record)
+
+    os.replace(tmp_path, path)
+    return len(records)
+
+class SpeciesSnapshot:
+    """Read-only, memory-mapped species snapshot.
+
+    Nothing is loaded up front: lookups binary search the name table directly in
+    the mapping, so every worker shares the same pages through the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.record_count, self.name_count, self._name_table,
+         self._name_blob, self._record_table, self._record_blob) = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a species snapshot (version {VERSION})")
+
+    def __len__(self):
+        return self.record_count
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def _name_at(self, position: int):
+        offset, length, record_index = NAME_ENTRY.unpack_from(self._mmap, self._name_table + position * NAME_ENTRY.size)
+        start = self._name_blob + offset
+        return self._mmap[start:start + length], record_index
+
+    def _record(self, record_index: int) -> Dict[str, Any]:
+        offset, length = RECORD_ENTRY.unpack_from(self._mmap, self._record_table + record_index * RECORD_ENTRY.size)
+        start = self._record_blob + offset
+        return _loads(self._mmap[start:start + length])
+
+    def _find(self, key: str) -> Optional[Dict[str, Any]]:
+        target = key.encode("utf-8")
+        low, high = 0, self.name_count
+        while low < high:
+            middle = (low + high) // 2
+            name, record_index = self._name_at(middle)
+            if name < target:
+                low = middle + 1
+            elif name > target:
+                high = middle
+            else:
+                return self._record(record_index)
+        return None
+
+    def lookup(self, plant_name: str) -> Optional[Dict[str, Any]]:
+        """Record for an exact common, scientific or other name"""
+        key = normalise(plant_name)
+        return self._find(key) if key else None
+
+    def lookup_perenual_id(self, perenual_id) -> Optional[Dict[str, Any]]:
+        return self._find(perenual_id_key(perenual_id))
+
+# Snapshot mapped by this process, if one is configured
+species_snapshot: Optional[SpeciesSnapshot] = None
+
+def open_species_snapshot(path: Optional[str] = None) -> Optional[SpeciesSnapshot]:
+    """Map the snapshot named by SPECIES_SNAPSHOT_PATH (if it exists)"""
+    global species_snapshot
+
+    path = path or os.getenv("SPECIES_SNAPSHOT_PATH")
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        snapshot = SpeciesSnapshot(path)
+    except Exception as e:
+        logger.error(f"Failed to open species snapshot {path}: {str(e)}")
+        return None
+
+    # A replaced snapshot is left for the garbage collector, in case a lookup is still using it
+    species_snapshot = snapshot
+
+    logger.info(f"Mapped species snapshot {path} with {len(snapshot)} species")
+    return snapshot
+
+def lookup_snapshot_care(plant_id=None, plant_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Care details from the mapped snapshot, or None if there isn't one or it has no match"""
+    snapshot = species_snapshot
+    if snapshot is None:
+        return None
+
+    return snapshot.lookup_perenual_id(plant_id) if plant_id else snapshot.lookup(plant_name)
@@ -0,0 +1,182 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+from app.config import db
+from app.plants.species_search import species_index
+from app.plants.species_autocomplete import species_autocomplete
+
+logger = logging.getLogger(__name__)
+
+# Care fields stored once per species in plantspecies and hydrated into plants as care_info
+CARE_FIELDS = (
+    "care_instructions", "watering_frequency", "sunlight_requirements", "humidity",
+    "temperature", "fertilization", "description", "perenual_image_url"
+)
+
+# Care instructions PerenualAPI falls back to when it has nothing species specific
+DEFAULT_CARE_INSTRUCTIONS = (
+    "General care instructions for this plant",
+    "General care instructions not available"
+)
+
+def is_default_care(care_details: Dict[str, Any]) -> bool:
+    """Whether care details are the generic fallback rather than data from Perenual"""
+    return care_details.get("care_instructions") in DEFAULT_CARE_INSTRUCTIONS
+
+def species_key(name: Optional[str]) -> str:
+    """Normalise a species name so the same species always maps to the same document"""
+    return " ".join((name or "").lower().split())
+
+def upsert_species(
+    name: str,
+    scientific_name: Optional[str],
+    care_info: Dict[str, Any],
+    perenual_id: Optional[int] = None,
+    other_names: Optional[List[str]] = None
+) -> Optional[str]:
+    """Store care data for a species (once) and return its plantspecies id.
+    
+    The species document is shared by every user, so care data only overwrites it
+    when it comes from Perenual's details endpoint (a perenual_id is given). Care
+    data supplied by clients only seeds a species the first time it is seen.
+    """
+    key = species_key(scientific_name) or species_key(name)
+    if not key:
+        return None
+    
+    care_fields = {field: care_info[field] for field in CARE_FIELDS if field in care_info}
+    on_insert = {
+        "key": key,
+        "name": name,
+        "scientific_name": scientific_name or "",
+        "created_at": datetime.now()
+    }
+    
+    if perenual_id:
+        update = {
+            "$set": dict(care_fields, perenual_id=perenual_id, updated_at=datetime.now()),
+            "$setOnInsert": on_insert
+        }
+    else:
+        # updated_at is left alone too, so ingestion still refreshes the species from Perenual
+        update = {"$setOnInsert": dict(care_fields, **on_insert)}
+    
+    if other_names:
+        update["$addToSet"] = {"other_names": {"$each": other_names}}
+    
+    species = db.plantspecies.find_one_and_update(
+        {"key": key},
+        update,
+        upsert=True,
+        projection={"key": 0, "created_at": 0, "updated_at": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    species["_id"] = str(species["_id"])
+    
+    # Every species we have seen becomes searchable locally
+    species_index.add(species)
+    species_autocomplete.add(species)
+    return species["_id"]
+
+def remember_species(care_details: Dict[str, Any], perenual_id: Optional[int] = None) -> Optional[str]:
+    """Store a Perenual care lookup in the local species store"""
+    # Storing the fallback would answer every later search with generic care
+    # instead of trying Perenual again
+    if is_default_care(care_details) or not care_details.get("perenual_id"):
+        return None
+    
+    care_info = dict(care_details)
+    care_info["perenual_image_url"] = care_details.get("image_url")
+    
+    scientific_name = care_details.get("scientific_name")
+    if scientific_name == "Unknown":
+        scientific_name = None
+    
+    try:
+        return upsert_species(care_details.get("name"), scientific_name, care_info, perenual_id=perenual_id)
+    except Exception as e:
+        logger.error(f"Failed to store species locally: {str(e)}")
+        return None
+
+def get_species(species_id: str) -> Optional[dict]:
+    """Look up a species in the local store by its plantspecies id"""
+    species = species_index.get(species_id)
+    if species:
+        return species
+    
+    if not ObjectId.is_valid(species_id):
+        return None
+    
+    species = db.plantspecies.find_one({"_id": ObjectId(species_id)}, {"key": 0, "created_at": 0, "updated_at": 0})
+    if species:
+        species["_id"] = str(species["_id"])
+    return species
+
+def find_local_care(perenual_id=None, plant_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Care details for a species from the local catalog, shaped like PerenualAPI results"""
+    species = None
+    
+    if perenual_id:
+        species = species_index.find_by_perenual_id(perenual_id)
+        if not species and str(perenual_id).isdigit():
+            # Entries ingested by another process may not be in this worker's index yet
+            species = db.plantspecies.find_one({"perenual_id": int(perenual_id)})
+    elif plant_name:
+        species = species_index.find_exact(plant_name)
+    
+    # Only trust entries that came from Perenual's details endpoint with real care data
+    if not species or not species.get("perenual_id") or not species.get("care_instructions"):
+        return None
+    if is_default_care(species):
+        return None
+    
+    return {
+        "name": species.get("name", "Unknown Plant"),
+        "scientific_name": species.get("scientific_name") or "Unknown",
+        "care_instructions": species.get("care_instructions"),
+        "watering_frequency": species.get("watering_frequency"),
+        "sunlight_requirements": species.get("sunlight_requirements"),
+        "humidity": species.get("humidity"),
+        "temperature": species.get("temperature"),
+        "fertilization": species.get("fertilization"),
+        "description": species.get("description"),
+        "image_url": species.get("perenual_image_url"),
+        "perenual_id": species.get("perenual_id")
+    }
+
+def load_local_species():
+    """Build the in-memory search and autocomplete indexes from every stored species"""
+    try:
+        count = 0
+        for species in db.plantspecies.find({}, {"key": 0, "created_at": 0, "updated_at": 0}):
+            species["_id"] = str(species["_id"])
+            species_index.add(species)
+            species_autocomplete.add(species)
+            count += 1
+        logger.info(f"Loaded {count} species into the local search indexes")
+    except Exception as e:
+        logger.error(f"Failed to load local species indexes: {str(e)}")
+
+def hydrate_care_info(plants: List[dict]) -> List[dict]:
+    """Fill in care_info on plants from their species with one batched $in lookup"""
+    # Plants saved before care data was normalised still carry their own copy
+    species_ids = {
+        plant["species_id"] for plant in plants
+        if not plant.get("care_info") and plant.get("species_id") and ObjectId.is_valid(plant["species_id"])
+    }
+    
+    species_by_id = {}
+    if species_ids:
+        projection = {field: 1 for field in CARE_FIELDS}
+        for species in db.plantspecies.find({"_id": {"$in": [ObjectId(i) for i in species_ids]}}, projection):
+            species_by_id[str(species.pop("_id"))] = species
+    
+    for plant in plants:
+        if not plant.get("care_info"):
+            plant["care_info"] = species_by_id.get(plant.get("species_id"), {})
+    
+    return plants
@@ -0,0 +1,241 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from app import cache
+from app.auth.utils import get_current_user, user_from_token
+from app.responses import FastJSONResponse
+from app.users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Count requests in the shared cache backend so the limit holds across workers
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "false").lower() == "true"
+
+# Default "requests/seconds" per endpoint group, overridable with RATE_LIMIT_<NAME>
+DEFAULT_LIMITS = {
+    # PlantNet quota plus several Perenual calls per request
+    "identify": "10/60",
+    # Can fall through to Perenual
+    "species": "60/60",
+    # Local index only, but called on every keystroke
+    "species_autocomplete": "300/60"
+}
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset))
+        }
+
+class TokenBucketLimiter:
+    """Per-key token buckets held in this process.
+
+    Each key can burst up to `limit` requests and regains limit/period tokens a
+    second. Idle keys are evicted least recently used first.
+    """
+
+    def __init__(self, name: str, limit: int, period: float, max_keys: int = 10000):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(self.limit), now))
+            tokens = min(self.limit, tokens + (now - last) * self.rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return Decision(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=int(tokens),
+            reset=(self.limit - tokens) / self.rate,
+            retry_after=0 if allowed else (1 - tokens) / self.rate
+        )
+
+class SlidingWindowLimiter:
+    """Sliding window counter kept in the shared cache backend.
+
+    Counts the current and previous fixed windows and weights the previous one by
+    how much of it still overlaps the sliding window. Only allowed requests are
+    counted, so a client retrying while limited isn't kept locked out.
+    """
+
+    def __init__(self, name: str, limit: int, period: float, backend):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.backend = backend
+
+    def hit(self, key: str) -> Decision:
+        now = time.time()
+        window = int(now // self.period)
+        elapsed = now - window * self.period
+        prefix = f"ratelimit:{self.name}:{key}"
+        current_key = f"{prefix}:{window}"
+
+        # Count the hit up front so concurrent workers see it, and take it back if it's denied
+        current = self.backend.incr(current_key, ttl=self.period * 2)
+        previous = self.backend.get_count(f"{prefix}:{window - 1}")
+        estimated = previous * (1 - elapsed / self.period) + current
+
+        allowed = estimated <= self.limit
+        if not allowed:
+            self.backend.incr(current_key, ttl=self.period * 2, amount=-1)
+            estimated -= 1
+
+        return Decision(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=max(0, int(self.limit - estimated)),
+            reset=self.period - elapsed,
+            retry_after=0 if allowed else self.period - elapsed
+        )
+
+def _build_limiter(name: str, spec: str):
+    limit, period = spec.split("/")
+    limit, period = int(limit), float(period)
+
+    if RATE_LIMIT_SHARED and cache.shared_backend is not None:
+        return SlidingWindowLimiter(name, limit, period, cache.shared_backend)
+    return TokenBucketLimiter(name, limit, period)
+
+limiters = {
+    name: _build_limiter(name, os.getenv(f"RATE_LIMIT_{name.upper()}", spec))
+    for name, spec in DEFAULT_LIMITS.items()
+}
+
+def _check(name: str, user) -> Optional[Decision]:
+    """Count a request against the named limit, None if the limiter itself failed"""
+    try:
+        return limiters[name].hit(str(user.id))
+    except Exception as e:
+        # A broken shared backend shouldn't take the endpoint down with it
+        logger.error(f"Rate limit check for {name} failed: {str(e)}")
+        return None
+
+def _rejected_headers(decision: Decision) -> Dict[str, str]:
+    return dict(decision.headers(), **{"Retry-After": str(max(1, math.ceil(decision.retry_after)))})
+
+def rate_limited(name: str):
+    """Dependency that authenticates the user and applies the named per-user limit"""
+    async def dependency(request: Request, current_user: User = Depends(get_current_user)) -> User:
+        decision = _check(name, current_user)
+        if decision is None:
+            return current_user
+
+        # Picked up by RateLimitHeadersMiddleware, so routes returning their own Response get them too
+        request.state.rate_limit_headers = decision.headers()
+
+        if not decision.allowed:
+            logger.warning(f"Rate limit {name} exceeded by user {current_user.username}")
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded, please slow down",
+                headers=_rejected_headers(decision)
+            )
+        return current_user
+
+    return dependency
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the named per-user limit to every request under a path prefix.
+
+    Used instead of the rate_limited dependency where admission control sits in front
+    of the route, so an over-limit request is turned away before it takes a queue slot.
+    Requests without a valid token pass through and are rejected by the route's auth.
+    """
+
+    def __init__(self, app, name: str, prefix: str, exclude: Iterable[str] = ()):
+        self.app = app
+        self.name = name
+        self.prefix = prefix
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        limited = (
+            scope["type"] == "http" and scope.get("method") != "OPTIONS" and
+            path.startswith(self.prefix) and not path.startswith(self.exclude)
+        )
+        user = self._user(scope) if limited else None
+        decision = _check(self.name, user) if user else None
+        if decision is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not decision.allowed:
+            logger.warning(f"Rate limit {self.name} exceeded by user {user.username}")
+            response = FastJSONResponse(
+                {"detail": "Rate limit exceeded, please slow down"},
+                status_code=429,
+                headers=_rejected_headers(decision)
+            )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["rate_limit_headers"] = decision.headers()
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _user(scope):
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    return user_from_token(token.strip())
+        return None
+
+class RateLimitHeadersMiddleware:
+    """ASGI middleware adding the X-RateLimit-* headers a rate_limited dependency recorded"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = (scope.get("state") or {}).get("rate_limit_headers")
+                if headers:
+                    existing = {name.lower() for name, _ in message.get("headers", [])}
+                    extra = [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in headers.items()
+                        if name.lower().encode("latin-1") not in existing
+                    ]
+                    message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,38 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from bson.objectid import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library if orjson isn't installed
+    orjson = None
+
+def _default(obj):
+    """Encode the Mongo/BSON types that can show up in documents"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, understanding ObjectId and datetime.
+    
+    Returning one of these from a route skips FastAPI's response_model validation
+    and jsonable_encoder, so only use it for data we already trust the shape of
+    (documents from our own Mongo projections, dicts we built ourselves).
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode("utf-8")
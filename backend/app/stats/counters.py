@@ -0,0 +1,137 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import db
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_STATS_ID = "global"
+
+# Named counters that grow with the catalog rather than one collection. The global
+# ones are kept as a document per name in collectionstatkeys (top N is an index
+# scan); per-user ones stay as maps on the user's stats document.
+KEYED_COUNTERS = ("families", "genera", "species", "identified_species")
+
+def global_key_id(kind: str, name: str) -> str:
+    return f"{kind}:{name}"
+
+def user_stats_id(user_id) -> str:
+    return f"user:{user_id}"
+
+def _counter_key(name: Optional[str]) -> str:
+    """Make a name safe to use as a Mongo field name"""
+    name = (name or "").strip()
+    if not name:
+        return "Unknown"
+    return name.replace(".", "_").replace("$", "_")
+
+def plant_taxonomy(plant: dict) -> Tuple[str, str, str]:
+    """Family, genus and species of a plant, taken from its top prediction where needed"""
+    predictions = plant.get("all_predictions") or [{}]
+    top = predictions[0] if isinstance(predictions[0], dict) else {}
+    
+    family = plant.get("family") or top.get("family")
+    genus = plant.get("genus") or top.get("genus")
+    species = plant.get("scientific_name") or top.get("scientific_name") or plant.get("type")
+    
+    return _counter_key(family), _counter_key(genus), _counter_key(species)
+
+def _plant_increments(plants: Iterable[dict], sign: int) -> Dict[str, int]:
+    """Fold a batch of plants into a single $inc document"""
+    increments = Counter()
+    for plant in plants:
+        family, genus, species = plant_taxonomy(plant)
+        increments["plants"] += sign
+        increments[f"families.{family}"] += sign
+        increments[f"genera.{genus}"] += sign
+        increments[f"species.{species}"] += sign
+    return dict(increments)
+
+def _apply(user_id, increments: Dict[str, int]):
+    """Apply the same increments to the user's and the global stats"""
+    if not increments:
+        return
+    
+    now = datetime.now()
+    global_increments = {}
+    keyed_updates = []
+    for field, amount in increments.items():
+        kind, _, name = field.partition(".")
+        if kind in KEYED_COUNTERS:
+            keyed_updates.append(UpdateOne(
+                {"_id": global_key_id(kind, name)},
+                {"$inc": {"count": amount}, "$setOnInsert": {"kind": kind, "name": name}},
+                upsert=True
+            ))
+        else:
+            global_increments[field] = amount
+    
+    try:
+        writes = [UpdateOne({"_id": user_stats_id(user_id)}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True)]
+        if global_increments:
+            writes.append(UpdateOne({"_id": GLOBAL_STATS_ID}, {"$inc": global_increments, "$set": {"updated_at": now}}, upsert=True))
+        db.collectionstats.bulk_write(writes, ordered=False)
+        
+        if keyed_updates:
+            db.collectionstatkeys.bulk_write(keyed_updates, ordered=False)
+    except Exception as e:
+        # Stats are best effort - never fail the plant write because of them
+        logger.error(f"Failed to update collection stats: {str(e)}")
+
+def record_plants_added(user_id, plants: List[dict]):
+    _apply(user_id, _plant_increments(plants, 1))
+
+def record_plants_removed(user_id, plants: List[dict]):
+    _apply(user_id, _plant_increments(plants, -1))
+
+def record_identification(user_id, result: dict):
+    """Count an identification towards most-identified species and identifications per day"""
+    species = _counter_key(result.get("scientific_name") or result.get("plant_type"))
+    day = datetime.now().strftime("%Y-%m-%d")
+    _apply(user_id, {
+        "identifications": 1,
+        f"identified_species.{species}": 1,
+        f"identifications_per_day.{day}": 1
+    })
+
+def _top(counter: Optional[dict], limit: int) -> List[dict]:
+    items = [(name, count) for name, count in (counter or {}).items() if count > 0]
+    items.sort(key=lambda item: item[1], reverse=True)
+    return [{"name": name, "count": count} for name, count in items[:limit]]
+
+def _top_global(kind: str, limit: int) -> List[dict]:
+    cursor = db.collectionstatkeys.find(
+        {"kind": kind, "count": {"$gt": 0}},
+        {"_id": 0, "name": 1, "count": 1}
+    ).sort("count", -1).limit(limit)
+    return [{"name": entry["name"], "count": entry["count"]} for entry in cursor]
+
+def get_stats(stats_id: str, limit: int = 10, days: int = 30) -> dict:
+    """Read a precomputed stats document and shape it for the API"""
+    doc = db.collectionstats.find_one({"_id": stats_id}) or {}
+    
+    per_day = doc.get("identifications_per_day") or {}
+    recent_days = sorted(per_day)[-days:]
+    
+    if stats_id == GLOBAL_STATS_ID:
+        top = {kind: _top_global(kind, limit) for kind in KEYED_COUNTERS}
+    else:
+        top = {kind: _top(doc.get(kind), limit) for kind in KEYED_COUNTERS}
+    
+    return {
+        "plants": doc.get("plants", 0),
+        "identifications": doc.get("identifications", 0),
+        "top_families": top["families"],
+        "top_genera": top["genera"],
+        "top_species": top["species"],
+        "most_identified_species": top["identified_species"],
+        "identifications_per_day": [{"date": day, "count": per_day[day]} for day in recent_days],
+        "updated_at": doc.get("updated_at")
+    }
+
+def delete_user_stats(user_id):
+    db.collectionstats.delete_one({"_id": user_stats_id(user_id)})
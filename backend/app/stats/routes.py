@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.utils import get_current_user
+from app.users.models import User
+from app.stats.counters import get_stats, user_stats_id, GLOBAL_STATS_ID
+
+router = APIRouter()
+
+@router.get("/me", response_model=dict)
+async def get_my_stats(
+    limit: int = Query(10, ge=1, le=100),
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user)
+):
+    """Collection statistics for the current user, read from precomputed counters"""
+    return get_stats(user_stats_id(current_user.id), limit=limit, days=days)
+
+@router.get("/global", response_model=dict)
+async def get_global_stats(
+    limit: int = Query(10, ge=1, le=100),
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user)
+):
+    """Statistics across all users, read from precomputed counters"""
+    return get_stats(GLOBAL_STATS_ID, limit=limit, days=days)
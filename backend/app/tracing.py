@@ -0,0 +1,243 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Spans are only recorded when at least one export target is configured
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")  # e.g. http://localhost:4318/v1/traces
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "floradex-api")
+
+TRACING_ENABLED = bool(TRACE_EXPORT_PATH or TRACE_OTLP_ENDPOINT)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+class Span:
+    """A timed operation, shaped after the OpenTelemetry span model"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.events: List[dict] = []
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.events.append({
+            "name": "exception",
+            "timeUnixNano": str(time.time_ns()),
+            "attributes": _otlp_attributes({"exception.type": type(error).__name__, "exception.message": str(error)})
+        })
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status, "message": self.status_message}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+class _NoopSpan:
+    """Stands in when tracing is off or the trace wasn't sampled"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, error):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+class SpanExporter:
+    """Background thread batching finished spans to a JSON-lines file and/or an OTLP/HTTP collector"""
+
+    def __init__(self, path: Optional[str], endpoint: Optional[str], batch_size: int = 512, interval: float = 2.0):
+        self.path = path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        # Bounded so a stuck collector drops spans instead of growing memory
+        self._queue = queue.Queue(maxsize=10000)
+        self.dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        # Started lazily so each forked worker runs its own exporter thread
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: List[Span]):
+        spans = [span.to_otlp() for span in batch]
+
+        if self.path:
+            data = "".join(
+                json.dumps(dict(span, resource={"service.name": SERVICE_NAME})) + "\n" for span in spans
+            ).encode("utf-8")
+            try:
+                # Every forked worker appends to the same file, so each batch goes out as a
+                # single write on an O_APPEND descriptor and lines from different workers can't interleave
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    written = os.write(fd, data)
+                    while written < len(data):
+                        written += os.write(fd, data[written:])
+                finally:
+                    os.close(fd)
+            except Exception as e:
+                logger.error(f"Writing spans to {self.path} failed: {str(e)}")
+
+        if self.endpoint:
+            payload = {
+                "resourceSpans": [{
+                    "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                    "scopeSpans": [{"scope": {"name": "floradex"}, "spans": spans}]
+                }]
+            }
+            request = urllib.request.Request(
+                self.endpoint,
+                data=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                logger.error(f"Exporting {len(spans)} spans to {self.endpoint} failed: {str(e)}")
+
+exporter = SpanExporter(TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT) if TRACING_ENABLED else None
+
+def current_span():
+    """The active span, for adding attributes (a no-op stand-in if there isn't one)"""
+    return _current_span.get() or NOOP_SPAN
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = SPAN_KIND_INTERNAL):
+    """Record a child of the current span (or start a new trace) around a block"""
+    parent = _current_span.get()
+    attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+
+    if exporter is None or parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+
+    if parent is None:
+        # New trace - the sampling decision is made once, at the root
+        if random.random() >= TRACE_SAMPLE_RATIO:
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+        new_span = Span(name, f"{random.getrandbits(128):032x}", None, kind, attributes)
+    else:
+        new_span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end_ns = time.time_ns()
+        if new_span.status == STATUS_UNSET:
+            new_span.status = STATUS_OK
+        exporter.export(new_span)
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """Decorator recording a span around every call of a function (sync or async)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
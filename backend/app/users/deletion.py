@@ -0,0 +1,128 @@
+import logging
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from app.config import db
+from app.plants.images import delete_plant_images
+from app.stats.counters import record_plants_removed, delete_user_stats
+
+logger = logging.getLogger(__name__)
+
+# Number of plants removed per delete_many
+BATCH_SIZE = 500
+
+# A pending or running job untouched for this long lost its worker and is picked up again
+STALE_JOB_SECONDS = int(os.getenv("DELETION_JOB_STALE_SECONDS", "60"))
+
+def create_deletion_job(user_id, username: str) -> str:
+    """Record a new account deletion job and return its id"""
+    # The job outlives the account, so its id doubles as the (unguessable) handle for progress checks
+    job_id = secrets.token_urlsafe(16)
+    db.deletionjobs.insert_one({
+        "_id": job_id,
+        "user_id": str(user_id),
+        "username": username,
+        "status": "pending",
+        "plants_deleted": 0,
+        "images_deleted": 0,
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+        "finished_at": None
+    })
+    return job_id
+
+def cancel_deletion_job(job_id: str):
+    """Mark a job that must not run because its account was never deleted"""
+    db.deletionjobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": "cancelled", "updated_at": datetime.now(), "finished_at": datetime.now()}}
+    )
+
+def run_account_deletion(job_id: str, user_id):
+    """Delete everything that belongs to a user in batches, recording progress on the job"""
+    user_id = str(user_id)
+    db.deletionjobs.update_one({"_id": job_id}, {"$set": {"status": "running", "updated_at": datetime.now()}})
+    
+    # Older plants may have stored the raw ObjectId - an $in on one field keeps this on the user_id index
+    owner_query = {"user_id": {"$in": [user_id, ObjectId(user_id)]}}
+    
+    try:
+        while True:
+            batch = list(db.userplants.find(
+                owner_query,
+                {"image_url": 1, "type": 1, "scientific_name": 1, "all_predictions": 1}
+            ).limit(BATCH_SIZE))
+            if not batch:
+                break
+            
+            db.userplants.delete_many({"_id": {"$in": [plant["_id"] for plant in batch]}})
+            images_deleted = delete_plant_images(plant.get("image_url") for plant in batch)
+            record_plants_removed(user_id, batch)
+            
+            db.deletionjobs.update_one(
+                {"_id": job_id},
+                {
+                    "$inc": {"plants_deleted": len(batch), "images_deleted": images_deleted},
+                    "$set": {"updated_at": datetime.now()}
+                }
+            )
+            logger.info(f"Deletion job {job_id}: removed {len(batch)} plants")
+        
+        # Sync tombstones and per-user stats are meaningless once the account is gone
+        db.planttombstones.delete_many({"user_id": user_id})
+        delete_user_stats(user_id)
+        
+        db.deletionjobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "completed", "finished_at": datetime.now()}}
+        )
+        logger.info(f"Deletion job {job_id} completed")
+    except Exception as e:
+        logger.error(f"Deletion job {job_id} failed: {str(e)}")
+        db.deletionjobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.now()}}
+        )
+
+def resume_deletion_jobs() -> int:
+    """Restart jobs left pending or running by a worker that stopped, returns how many were resumed"""
+    cutoff = datetime.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    stale = {
+        "status": {"$in": ["pending", "running"]},
+        "$or": [{"updated_at": {"$lt": cutoff}}, {"updated_at": {"$exists": False}}]
+    }
+    
+    resumed = 0
+    for job in db.deletionjobs.find(stale, {"user_id": 1}):
+        # Claim the job so only one worker picks it up
+        claimed = db.deletionjobs.update_one(
+            dict(stale, _id=job["_id"]),
+            {"$set": {"updated_at": datetime.now()}}
+        )
+        if not claimed.modified_count:
+            continue
+        
+        # The user delete never happened (or failed) - running the job would empty a live account
+        if db.users.find_one({"_id": ObjectId(job["user_id"])}, {"_id": 1}):
+            logger.warning(f"Deletion job {job['_id']} cancelled, its account still exists")
+            cancel_deletion_job(job["_id"])
+            continue
+        
+        logger.info(f"Resuming deletion job {job['_id']}")
+        threading.Thread(
+            target=run_account_deletion,
+            args=(job["_id"], job["user_id"]),
+            name=f"deletion-{job['_id']}",
+            daemon=True
+        ).start()
+        resumed += 1
+    
+    return resumed
+
+def get_deletion_job(job_id: str):
+    """Fetch the progress of a deletion job"""
+    return db.deletionjobs.find_one({"_id": job_id}, {"user_id": 0})
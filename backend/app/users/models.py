@@ -1,6 +1,6 @@
 from bson import ObjectId
 from pydantic import BaseModel, Field, field_serializer
-from typing import Optional, List, Annotated, Any
+from typing import Optional, Annotated, Any
 from datetime import datetime
 
 # Custom type for handling MongoDB ObjectId
@@ -32,8 +32,12 @@ class UserCreate(UserBase):
 
 class UserInDB(UserBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
-    hashed_password: str
-    plants: List[str] = []
+    # Only read for password checks - users loaded through the cache never carry it
+    hashed_password: Optional[str] = None
+    # Maintained counter - the plants themselves are looked up in userplants by user_id
+    plant_count: int = 0
+    # Bumped on every change to the user's plant collection, used for ETags
+    collection_version: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     
@@ -50,14 +54,14 @@ class UserInDB(UserBase):
                 "_id": "123456789012345678901234",
                 "username": "example_user",
                 "hashed_password": "hashedpassword",
-                "plants": [],
+                "plant_count": 0,
             }
         }
     }
 
 class User(UserBase):
     id: str = Field(alias="_id")
-    plants: List[str] = []
+    plant_count: int = 0
     
     model_config = {
         "populate_by_name": True
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from bson.objectid import ObjectId
 
 from app.config import db
-from app.auth.utils import get_current_user, get_password_hash
+from app.auth.utils import get_current_user, get_password_hash, invalidate_user
 from app.users.models import User, UserUpdate
+from app.users.deletion import create_deletion_job, cancel_deletion_job, run_account_deletion, get_deletion_job
 
 router = APIRouter()
 
@@ -39,34 +40,53 @@ async def update_user(
             {"_id": ObjectId(current_user.id)},
             {"$set": update_data}
         )
+        invalidate_user(current_user.username)
     
     # Get the updated user
-    updated_user = db.users.find_one({"_id": ObjectId(current_user.id)})
+    updated_user = db.users.find_one({"_id": ObjectId(current_user.id)}, {"plants": 0})
     return updated_user
 
-@router.delete("/me", response_model=dict)
-async def delete_user(current_user: User = Depends(get_current_user)):
+@router.delete("/me", response_model=dict, status_code=202)
+async def delete_user(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
     # Print debugging information
     print(f"Deleting user: {current_user.username} with ID: {current_user.id}")
     
     try:
-        # Delete all plants associated with the user
-        plants_result = db.userplants.delete_many({
-            "$or": [
-                {"user_id": str(current_user.id)},
-                {"user_id": current_user.id}  # Without string conversion
-            ]
-        })
-        print(f"Deleted {plants_result.deleted_count} plants")
+        # Record the job before the account goes, so a crash in between leaves a job to resume
+        # rather than plants nobody can reach
+        job_id = create_deletion_job(current_user.id, current_user.username)
         
-        # Delete the user
-        user_result = db.users.delete_one({"_id": ObjectId(current_user.id)})
+        try:
+            user_result = db.users.delete_one({"_id": ObjectId(current_user.id)})
+        except Exception:
+            cancel_deletion_job(job_id)
+            raise
         print(f"User deletion result: {user_result.deleted_count}")
         
         if user_result.deleted_count == 0:
+            cancel_deletion_job(job_id)
             raise HTTPException(status_code=404, detail="User not found")
+        invalidate_user(current_user.username)
+        
+        # Plants and their images are removed in the background
+        background_tasks.add_task(run_account_deletion, job_id, current_user.id)
         
-        return {"success": True, "message": "Account deleted successfully"}
+        return {"success": True, "message": "Account deleted successfully", "job_id": job_id}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error deleting user: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error deleting account: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deleting account: {str(e)}")
+
+@router.get("/deletion-jobs/{job_id}", response_model=dict)
+async def get_deletion_status(job_id: str):
+    # No authentication - the account is gone by now, the job id itself is the secret
+    job = get_deletion_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    
+    job["job_id"] = job.pop("_id")
+    return job
@@ -0,0 +1,75 @@
+"""
+Import-time budget check for the API.
+
+Imports app.main in a fresh interpreter with `python -X importtime`, prints the
+slowest modules and exits non-zero if the total goes over the budget or if a
+dependency that should be loaded lazily was imported at startup.
+
+Run from the backend directory:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --budget-ms 800 --top 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Startup budget in milliseconds for importing app.main
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# Heavy packages that must only be imported on first use
+LAZY_MODULES = ("requests", "tensorflow", "PIL", "numpy")
+
+def measure(module):
+    """Import the module in a fresh interpreter and return (self_us, cumulative_us, name) rows"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        # The import itself failed - show why instead of a meaningless timing
+        print(result.stderr.splitlines()[-1] if result.stderr else "import failed", file=sys.stderr)
+        sys.exit(2)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:       123 |       4567 |   package.module"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the API's import time against a budget")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Fail above this many milliseconds")
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = sum(self_us for self_us, _, _ in rows) / 1000
+
+    print("Slowest imports (cumulative):")
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>16.1f} {self_us / 1000:>10.1f}  {name}")
+
+    failed = False
+
+    eager = sorted({name.strip() for _, _, name in rows if name.strip().split(".")[0] in LAZY_MODULES})
+    if eager:
+        print(f"\nImported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+
+    print(f"\nTotal import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if total_ms > args.budget_ms:
+        print("Import time budget exceeded!")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
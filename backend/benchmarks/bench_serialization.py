@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of list endpoint serialisation.
+
+Compares FastAPI's default path (response_model validation + jsonable_encoder +
+JSONResponse) with returning the Mongo documents through FastJSONResponse.
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py
+"""
+import sys
+import os
+import timeit
+from datetime import datetime
+from typing import List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson.objectid import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.plants.models import UserPlant
+from app.responses import FastJSONResponse
+
+def make_plants(count):
+    """Build documents shaped like the ones stored in userplants"""
+    user_id = str(ObjectId())
+    plants = []
+    for i in range(count):
+        plants.append({
+            "_id": str(ObjectId()),
+            "type": "Monstera deliciosa",
+            "user_id": user_id,
+            "date_added": datetime.now().isoformat(),
+            "name": f"Monstera {i}",
+            "confidence": 0.87,
+            "all_predictions": [
+                {
+                    "plant_type": "Swiss cheese plant",
+                    "scientific_name": "Monstera deliciosa",
+                    "genus": "Monstera",
+                    "family": "Araceae",
+                    "common_names": ["Swiss cheese plant", "Split-leaf philodendron"],
+                    "confidence": 0.87
+                }
+                for _ in range(3)
+            ],
+            "species_id": None,
+            "image_url": f"/static/uploads/plants/{user_id}_{i}.jpg"
+        })
+    return plants
+
+adapter = TypeAdapter(List[UserPlant])
+
+def default_path(plants):
+    validated = adapter.validate_python(plants)
+    content = jsonable_encoder(validated, by_alias=True)
+    return JSONResponse(content).body
+
+def fast_path(plants):
+    return FastJSONResponse(plants).body
+
+def main():
+    print(f"{'plants':>8} {'default (ms)':>14} {'fast (ms)':>12} {'speedup':>9}")
+    for count in (10, 100, 1000):
+        plants = make_plants(count)
+        number = max(1, 2000 // count)
+
+        default_time = min(timeit.repeat(lambda: default_path(plants), number=number, repeat=5)) / number
+        fast_time = min(timeit.repeat(lambda: fast_path(plants), number=number, repeat=5)) / number
+
+        print(f"{count:>8} {default_time * 1000:>14.3f} {fast_time * 1000:>12.3f} {default_time / fast_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
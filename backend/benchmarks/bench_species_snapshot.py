@@ -0,0 +1,54 @@
+"""
+Micro-benchmark of species snapshot lookups.
+
+Builds a synthetic snapshot and times hits by name, hits by Perenual ID and
+misses against it.
+
+Run from the backend directory:
+    python benchmarks/bench_species_snapshot.py
+"""
+import sys
+import os
+import tempfile
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.plants.species_snapshot import SpeciesSnapshot, write_species_snapshot
+
+def make_species(count):
+    for i in range(count):
+        yield {
+            "perenual_id": i + 1,
+            "name": f"Common plant {i}",
+            "scientific_name": f"Genus species{i}",
+            "other_names": [f"Other name {i}"],
+            "care_instructions": "Water when the top of the soil is dry. " * 5,
+            "watering_frequency": "Average",
+            "sunlight_requirements": "Part shade",
+            "humidity": "Average",
+            "temperature": "18-24°C (65-75°F)",
+            "fertilization": "Medium",
+            "description": "A plant used for benchmarking. " * 10,
+            "perenual_image_url": f"https://example.com/{i}.jpg"
+        }
+
+def main():
+    print(f"{'species':>8} {'file (KB)':>10} {'name hit (us)':>14} {'id hit (us)':>12} {'miss (us)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (1000, 10000, 100000):
+            path = os.path.join(directory, f"species_{count}.snapshot")
+            write_species_snapshot(path, make_species(count))
+            snapshot = SpeciesSnapshot(path)
+
+            number = 20000
+            name_hit = min(timeit.repeat(lambda: snapshot.lookup(f"genus species{count // 2}"), number=number, repeat=3)) / number
+            id_hit = min(timeit.repeat(lambda: snapshot.lookup_perenual_id(count // 3), number=number, repeat=3)) / number
+            miss = min(timeit.repeat(lambda: snapshot.lookup("no such plant"), number=number, repeat=3)) / number
+
+            size_kb = os.path.getsize(path) / 1024
+            print(f"{count:>8} {size_kb:>10.0f} {name_hit * 1e6:>14.2f} {id_hit * 1e6:>12.2f} {miss * 1e6:>10.2f}")
+            snapshot.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Build a read-only species snapshot from the local catalog.
+
+Workers map the file named by SPECIES_SNAPSHOT_PATH at startup and answer
+care lookups from it before touching Mongo or Perenual.
+
+Usage (run from the backend directory):
+    python build_species_snapshot.py [output path]
+"""
+import sys
+import os
+import time
+
+# Import the database connection from your app's config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import db
+from app.plants.species_snapshot import write_species_snapshot
+
+output_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("SPECIES_SNAPSHOT_PATH", "species.snapshot")
+
+start = time.perf_counter()
+
+# Only species with Perenual care details are worth shipping
+species_list = db.plantspecies.find(
+    {"perenual_id": {"$exists": True}, "care_instructions": {"$exists": True}},
+    {"key": 0, "created_at": 0, "updated_at": 0}
+).sort("perenual_id", 1)
+
+count = write_species_snapshot(output_path, species_list)
+
+elapsed = time.perf_counter() - start
+print(f"Wrote {count} species to {output_path} ({os.path.getsize(output_path)} bytes) in {elapsed:.2f}s")
@@ -0,0 +1,38 @@
+"""
+Ingest the Perenual species catalog into the local plantspecies collection.
+
+Examples (run from the backend directory):
+    python ingest_perenual.py                      # continue from the last checkpoint
+    python ingest_perenual.py --pages 5 --rate 0.5
+    python ingest_perenual.py --restart            # start a new sweep from page 1
+    python ingest_perenual.py --refresh-only --max-age-days 14
+"""
+import argparse
+import sys
+import os
+
+# Import the database connection from your app's config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.identification.perenual_api import perenual_api
+from app.identification.perenual_catalog import ingest_catalog, refresh_stale_species
+from app.identification.rate_limiter import RateLimiter
+
+parser = argparse.ArgumentParser(description="Ingest the Perenual species catalog")
+parser.add_argument("--pages", type=int, default=None, help="Maximum number of list pages to process")
+parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from page 1")
+parser.add_argument("--max-age-days", type=int, default=30, help="Re-fetch species older than this")
+parser.add_argument("--refresh-only", action="store_true", help="Only refresh stale species already stored")
+parser.add_argument("--limit", type=int, default=None, help="Maximum species to refresh with --refresh-only")
+parser.add_argument("--rate", type=float, default=1.0, help="Maximum Perenual requests per second")
+args = parser.parse_args()
+
+# Ingestion shares the API client but paces itself, waiting for its turn instead of failing
+perenual_api.rate_limiter = RateLimiter(args.rate)
+
+if args.refresh_only:
+    stats = refresh_stale_species(max_age_days=args.max_age_days, limit=args.limit)
+else:
+    stats = ingest_catalog(max_pages=args.pages, restart=args.restart, max_age_days=args.max_age_days)
+
+print(f"Done: {stats}")
@@ -0,0 +1,55 @@
+"""
+Migration script to:
+1. Move the care_info embedded in userplants into one plantspecies document per species
+2. Point each plant at its species with species_id and drop the embedded copy
+"""
+import sys
+import os
+from pymongo import UpdateOne
+
+# Import the database connection from your app's config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import db
+from app.plants.species_store import upsert_species, species_key
+
+print("Connected to database successfully")
+
+BATCH_SIZE = 500
+
+# Species already written during this run, so each one is only upserted once
+species_ids = {}
+updates = []
+migrated = 0
+
+for plant in db.userplants.find(
+    {"care_info": {"$exists": True}},
+    {"type": 1, "scientific_name": 1, "care_info": 1}
+):
+    name = plant.get("type", "")
+    scientific_name = plant.get("scientific_name", "")
+    key = species_key(scientific_name) or species_key(name)
+    
+    if key not in species_ids:
+        species_ids[key] = upsert_species(name, scientific_name, plant.get("care_info") or {})
+    
+    updates.append(UpdateOne(
+        {"_id": plant["_id"]},
+        {"$set": {"species_id": species_ids[key]}, "$unset": {"care_info": ""}}
+    ))
+    
+    if len(updates) >= BATCH_SIZE:
+        db.userplants.bulk_write(updates, ordered=False)
+        migrated += len(updates)
+        updates = []
+
+if updates:
+    db.userplants.bulk_write(updates, ordered=False)
+    migrated += len(updates)
+
+print(f"Moved care info for {migrated} plants into {len(species_ids)} species")
+
+# Species are looked up by their normalised name when plants are added
+db.plantspecies.create_index("key", unique=True, sparse=True)
+
+print("Migration completed!")
@@ -0,0 +1,44 @@
+"""
+Migration script to:
+1. Replace the denormalised users.plants array with a plant_count counter
+2. Make sure userplants is indexed by user_id for collection lookups
+"""
+import sys
+import os
+
+# Import the database connection from your app's config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import db
+from app.indexes import ensure_indexes
+
+print("Connected to database successfully")
+
+# 1. Count plants per user with a single aggregation over userplants
+# Older plants may store user_id as an ObjectId and newer ones as a string, which
+# group separately - add them up under the string form
+counts = {}
+for row in db.userplants.aggregate([
+    {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+]):
+    key = str(row["_id"])
+    counts[key] = counts.get(key, 0) + row["count"]
+print(f"Counted plants for {len(counts)} users")
+
+# 2. Set the counter and drop the array on every user
+updated = 0
+for user in db.users.find({}, {"_id": 1}):
+    db.users.update_one(
+        {"_id": user["_id"]},
+        {
+            "$set": {"plant_count": counts.get(str(user["_id"]), 0)},
+            "$unset": {"plants": ""}
+        }
+    )
+    updated += 1
+print(f"Updated {updated} users with plant_count and removed their plants array")
+
+# 3. Collection lookups now rely on the userplants indexes
+ensure_indexes()
+
+print("Migration completed!")
@@ -0,0 +1,148 @@
+"""
+Rebuild the collection statistics counters from userplants.
+
+Counts per family/genus/species are recomputed with a single aggregation
+pipeline and written over the existing counters. Identification counters
+(most identified species, identifications per day) are not derived from
+stored plants, so they are left untouched, apart from moving the global
+most-identified map (kept by older versions) into collectionstatkeys.
+"""
+import sys
+import os
+from collections import defaultdict
+from datetime import datetime
+from pymongo import UpdateOne
+
+# Import the database connection from your app's config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import db
+from app.stats.counters import GLOBAL_STATS_ID, user_stats_id, global_key_id, plant_taxonomy
+
+print("Connected to database successfully")
+
+# One pass over userplants, grouped by owner and every field plant_taxonomy reads
+pipeline = [
+    {"$project": {
+        "user_id": 1,
+        "type": 1,
+        "family": 1,
+        "genus": 1,
+        "scientific_name": 1,
+        "top_prediction": {"$arrayElemAt": [{"$ifNull": ["$all_predictions", []]}, 0]}
+    }},
+    {"$group": {
+        "_id": {
+            "user_id": "$user_id",
+            "family": "$family",
+            "genus": "$genus",
+            "scientific_name": "$scientific_name",
+            "type": "$type",
+            "top_family": "$top_prediction.family",
+            "top_genus": "$top_prediction.genus",
+            "top_scientific_name": "$top_prediction.scientific_name"
+        },
+        "count": {"$sum": 1}
+    }}
+]
+
+def new_counters():
+    return {
+        "plants": 0,
+        "families": defaultdict(int),
+        "genera": defaultdict(int),
+        "species": defaultdict(int)
+    }
+
+stats = defaultdict(new_counters)
+global_stats = new_counters()
+
+for row in db.userplants.aggregate(pipeline, allowDiskUse=True):
+    group = row["_id"]
+    # Rebuild the plant shape the incremental counters see, so both normalise names the same way
+    family, genus, species = plant_taxonomy({
+        "family": group.get("family"),
+        "genus": group.get("genus"),
+        "scientific_name": group.get("scientific_name"),
+        "type": group.get("type"),
+        "all_predictions": [{
+            "family": group.get("top_family"),
+            "genus": group.get("top_genus"),
+            "scientific_name": group.get("top_scientific_name")
+        }]
+    })
+    
+    for counters in (stats[user_stats_id(group.get("user_id"))], global_stats):
+        counters["plants"] += row["count"]
+        counters["families"][family] += row["count"]
+        counters["genera"][genus] += row["count"]
+        counters["species"][species] += row["count"]
+
+now = datetime.now()
+
+# Per-user counters stay as maps on each user's stats document
+updates = [
+    UpdateOne(
+        {"_id": stats_id},
+        {"$set": {
+            "plants": counters["plants"],
+            "families": dict(counters["families"]),
+            "genera": dict(counters["genera"]),
+            "species": dict(counters["species"]),
+            "updated_at": now
+        }},
+        upsert=True
+    )
+    for stats_id, counters in stats.items()
+]
+
+if updates:
+    db.collectionstats.bulk_write(updates, ordered=False)
+
+# Users whose plants have all gone keep their identification counters but lose the old plant counts
+db.collectionstats.update_many(
+    {"_id": {"$nin": list(stats) + [GLOBAL_STATS_ID]}},
+    {"$set": {"plants": 0, "families": {}, "genera": {}, "species": {}, "updated_at": now}}
+)
+
+# Global counters are a document per name in collectionstatkeys
+global_doc = db.collectionstats.find_one({"_id": GLOBAL_STATS_ID}) or {}
+key_updates = [
+    UpdateOne(
+        {"_id": global_key_id(kind, name)},
+        {"$set": {"kind": kind, "name": name, "count": count, "rebuilt_at": now}},
+        upsert=True
+    )
+    for kind in ("families", "genera", "species")
+    for name, count in global_stats[kind].items()
+]
+# Identification counts kept as a map by older versions move over unchanged
+key_updates.extend(
+    UpdateOne(
+        {"_id": global_key_id("identified_species", name)},
+        {"$inc": {"count": count}, "$setOnInsert": {"kind": "identified_species", "name": name}},
+        upsert=True
+    )
+    for name, count in (global_doc.get("identified_species") or {}).items()
+)
+
+if key_updates:
+    db.collectionstatkeys.bulk_write(key_updates, ordered=False)
+
+# Names no plant has any more
+db.collectionstatkeys.delete_many({
+    "kind": {"$in": ["families", "genera", "species"]},
+    "rebuilt_at": {"$ne": now}
+})
+
+db.collectionstats.update_one(
+    {"_id": GLOBAL_STATS_ID},
+    {
+        "$set": {"plants": global_stats["plants"], "updated_at": now},
+        "$unset": {"families": "", "genera": "", "species": "", "identified_species": ""}
+    },
+    upsert=True
+)
+
+print(f"Rebuilt collection stats for {len(stats)} users and {len(key_updates)} global counters")
+print("Rebuild completed!")
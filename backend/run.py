@@ -1,4 +1,126 @@
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
 import uvicorn
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("floradex.server")
+
+# Production tunables, all overridable from the environment
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+KEEP_ALIVE_SECONDS = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "5"))
+
+def _available(module):
+    return importlib.util.find_spec(module) is not None
+
+def bind_socket(host, port, backlog):
+    """Listening socket created once in the parent and inherited by every worker"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock, args):
+    """Serve the preloaded app on the shared socket until told to stop"""
+    config = uvicorn.Config(
+        app,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        access_log=False
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+def spawn_worker(app, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        # Child: the parent's signal handlers must not leak into the worker
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            run_worker(app, sock, args)
+        finally:
+            os._exit(0)
+    return pid
+
+def run_production(args):
+    # Preload before forking so every worker shares the imported code and module-level
+    # state copy-on-write. Mongo connects lazily, so no connection crosses the fork.
+    from app.main import app
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info(
+        f"Starting {args.workers} workers on {args.host}:{args.port} "
+        f"(loop={'uvloop' if _available('uvloop') else 'asyncio'}, "
+        f"http={'httptools' if _available('httptools') else 'h11'}, backlog={args.backlog}, "
+        f"keep-alive={args.keep_alive}s)"
+    )
+
+    workers = {spawn_worker(app, sock, args) for _ in range(args.workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        workers.discard(pid)
+        if not stopping:
+            # Replace workers that died instead of slowly losing capacity
+            logger.warning(f"Worker {pid} exited with status {status}, restarting it")
+            time.sleep(1)
+            workers.add(spawn_worker(app, sock, args))
+
+    sock.close()
+    logger.info("All workers stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Floradex API")
+    parser.add_argument("--prod", action="store_true", default=os.getenv("SERVER_MODE") == "production",
+                        help="Multi-worker production mode (or SERVER_MODE=production)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (default: CPU count)")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="Listen backlog of the shared socket")
+    parser.add_argument("--keep-alive", type=int, default=KEEP_ALIVE_SECONDS, help="Idle keep-alive timeout in seconds")
+    args = parser.parse_args()
+
+    if not args.prod:
+        # Development: single worker that reloads on file changes
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    if not hasattr(os, "fork"):
+        sys.exit("Production mode needs os.fork (Linux or macOS)")
+
+    run_production(args)
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    main()
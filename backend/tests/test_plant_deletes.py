@@ -0,0 +1,76 @@
+"""Racing deletes of the same plant must only be counted once.
+
+Runs the plant routes against an in-memory mongomock database (no server needed).
+"""
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+mongomock = pytest.importorskip("mongomock")
+
+from fastapi import HTTPException
+
+from app import config
+from app.plants import routes as plant_routes
+from app.stats.counters import user_stats_id
+from app.users.models import User
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock.MongoClient().floradex
+    monkeypatch.setattr(config, "_db", database)
+    return database
+
+@pytest.fixture
+def user(db):
+    user_id = db.users.insert_one({"username": "racer", "collection_version": 0, "plant_count": 0}).inserted_id
+    return User(_id=str(user_id), username="racer")
+
+def _run_in_threads(count, target):
+    results = [None] * count
+    
+    def run(index):
+        try:
+            results[index] = asyncio.run(target())
+        except HTTPException as e:
+            results[index] = e
+    
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_deletes_of_the_same_plant_count_once(db, user, monkeypatch):
+    created = asyncio.run(plant_routes.create_plant({"type": "Monstera", "scientific_name": "Monstera deliciosa"}, user))
+    plant_id = created["plant_id"]
+    
+    # Hold both requests after their ownership check, so both have seen the plant
+    # before either deletes it
+    barrier = threading.Barrier(2)
+    reserve = plant_routes.reserve_change_seq
+    
+    def reserve_after_both_checked(*args, **kwargs):
+        barrier.wait(timeout=5)
+        return reserve(*args, **kwargs)
+    
+    monkeypatch.setattr(plant_routes, "reserve_change_seq", reserve_after_both_checked)
+    
+    results = _run_in_threads(2, lambda: plant_routes.delete_plant(plant_id, user))
+    
+    successes = [result for result in results if result == {"success": True}]
+    not_found = [result for result in results if isinstance(result, HTTPException) and result.status_code == 404]
+    assert len(successes) == 1
+    assert len(not_found) == 1
+    
+    assert db.users.find_one({"username": "racer"})["plant_count"] == 0
+    assert db.planttombstones.count_documents({"plant_id": plant_id}) == 1
+    
+    stats = db.collectionstats.find_one({"_id": user_stats_id(user.id)})
+    assert stats["plants"] == 0
+    assert stats["species"]["Monstera deliciosa"] == 0